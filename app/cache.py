@@ -0,0 +1,267 @@
+"""
+Модуль сквозного кэша чтений (read-through) для пользователей и задач.
+
+Поддерживаются два хранилища:
+- `MemoryCache`: LRU с TTL внутри процесса;
+- `RedisCache`: любой клиент, совместимый с `redis.asyncio` (в тестах его
+  можно заменить локальной подделкой).
+
+Инвалидация построена на поколениях: ключи данных содержат номер поколения
+пространства имен (например, `tasks:42`), а обработчики записи после коммита
+увеличивают этот номер. Старые записи становятся недостижимыми сразу, а
+чтение, начатое до записи, может сохранить устаревшие данные только под
+старым поколением, которое больше никто не запросит.
+
+Настройки (переменные окружения):
+- CACHE_BACKEND: 'none' (по умолчанию), 'memory' или 'redis'.
+- CACHE_TTL: время жизни записи в секундах (по умолчанию 60).
+- CACHE_MAXSIZE: максимальное число записей в памяти (по умолчанию 10000).
+- CACHE_REDIS_URL: адрес Redis для бэкенда 'redis'.
+- CACHE_DISABLED_ROUTES: имена обработчиков через запятую, для которых кэш
+  отключен (например, `read_tasks,get_user`).
+
+Загрузка значения при промахе (и без кэша) проходит через `SingleFlight`:
+одинаковые одновременные чтения выполняют один запрос к базе данных.
+
+Кэш в памяти у каждого рабочего процесса свой: запись в одном процессе не
+инвалидирует другие, поэтому при нескольких воркерах следует использовать Redis.
+"""
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.singleflight import SingleFlight
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'none')
+CACHE_TTL = int(os.getenv('CACHE_TTL', '60'))
+CACHE_MAXSIZE = int(os.getenv('CACHE_MAXSIZE', '10000'))
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_DISABLED_ROUTES = {name.strip() for name in os.getenv('CACHE_DISABLED_ROUTES', '').split(',') if name.strip()}
+
+
+class CacheBackend(ABC):
+    """Интерфейс хранилища кэша. Значения - строки."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Возвращает значение или None, если ключа нет."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Сохраняет значение; `ttl` - время жизни в секундах (None - без ограничения)."""
+
+    @abstractmethod
+    async def add(self, key: str, value: str) -> None:
+        """Сохраняет значение без TTL, только если ключа еще нет."""
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Увеличивает числовое значение на единицу и возвращает новое."""
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU-кэш с TTL внутри процесса.
+
+    Атрибуты:
+        maxsize (int): Максимальное число записей.
+        evictions (int): Число записей, вытесненных по размеру или TTL.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[Optional[float], str]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        deadline, value = entry
+        if deadline is not None and time.monotonic() > deadline:
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        deadline = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (deadline, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def add(self, key: str, value: str) -> None:
+        if await self.get(key) is None:
+            await self.set(key, value)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        await self.set(key, str(value))
+        return value
+
+
+class RedisCache(CacheBackend):
+    """
+    Хранилище на основе клиента, совместимого с `redis.asyncio.Redis`.
+
+    Вытеснение выполняет сам Redis (TTL и политика maxmemory), поэтому
+    число вытеснений здесь не считается.
+
+    Аргументы:
+        client: Клиент с асинхронными методами get, set(ex=, nx=) и incr.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def add(self, key: str, value: str) -> None:
+        await self.client.set(key, value, nx=True)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class ReadCache:
+    """
+    Сквозной кэш чтений с инвалидацией по поколениям и метриками.
+
+    Атрибуты:
+        backend (Optional[CacheBackend]): Хранилище; None отключает кэш.
+        ttl (int): Время жизни записей в секундах.
+        disabled_routes (set[str]): Обработчики, для которых кэш отключен.
+        flights (SingleFlight): Объединение одновременных загрузок.
+        hits (int): Число попаданий.
+        misses (int): Число промахов.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: int, disabled_routes: set[str],
+                 flights: Optional[SingleFlight] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.disabled_routes = disabled_routes
+        self.flights = flights or SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def enabled(self, route: str) -> bool:
+        """Проверяет, используется ли кэш для обработчика `route`."""
+        return self.backend is not None and route not in self.disabled_routes
+
+    async def namespace(self, name: str) -> str:
+        """
+        Возвращает префикс ключей текущего поколения пространства имен.
+
+        Если номер поколения потерян (вытеснен или истек), он создается заново
+        из текущего времени, а не с нуля, чтобы не оживить старые записи.
+        """
+        key = f'gen:{name}'
+        generation = await self.backend.get(key)
+        if generation is None:
+            await self.backend.add(key, str(time.time_ns()))
+            generation = await self.backend.get(key)
+        return f'{name}:{generation}'
+
+    async def get_or_load(self, route: str, namespace: str, key: str,
+                          loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возвращает значение из кэша или загружает и сохраняет его.
+
+        Одновременные загрузки одного ключа объединяются (даже если кэш
+        для маршрута отключен): загрузчик выполняет только один из запросов.
+
+        Аргументы:
+            route (str): Имя обработчика (для отключения кэша по маршруту).
+            namespace (str): Пространство имен для инвалидации (например, `tasks:42`).
+            key (str): Ключ внутри пространства имен.
+            loader (Callable): Корутина, загружающая JSON-совместимое значение.
+
+        Возвращает:
+            Any: Значение из кэша или загруженное значение.
+        """
+        if not self.enabled(route):
+            return await self.flights.do(namespace, f'{route}:{key}', loader)
+        full_key = f'{await self.namespace(namespace)}:{key}'
+        raw = await self.backend.get(full_key)
+        if raw is not None:
+            self.hits += 1
+            return json.loads(raw)
+        self.misses += 1
+
+        async def load_and_store():
+            value = await loader()
+            await self.backend.set(full_key, json.dumps(value, ensure_ascii=False), self.ttl)
+            return value
+
+        return await self.flights.do(namespace, f'{route}:{key}', load_and_store)
+
+    async def invalidate(self, namespace: str) -> None:
+        """
+        Делает недостижимыми все записи пространства имен.
+
+        Вызывается обработчиками записи после коммита. Новые чтения также
+        перестают присоединяться к загрузкам, начатым до записи.
+        """
+        self.flights.forget(namespace)
+        if self.backend is not None:
+            await self.backend.incr(f'gen:{namespace}')
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает число попаданий, промахов, вытеснений, долю попаданий и статистику объединения загрузок.
+
+        Вытеснения считает только `MemoryCache`; для других хранилищ `evictions` равно None.
+        """
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions if isinstance(self.backend, MemoryCache) else None,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'single_flight': self.flights.stats(),
+        }
+
+
+def build_backend(name: str) -> Optional[CacheBackend]:
+    """
+    Создает хранилище кэша по имени из настроек.
+
+    Аргументы:
+        name (str): 'none', 'memory' или 'redis'.
+
+    Возвращает:
+        Optional[CacheBackend]: Хранилище или None, если кэш отключен.
+
+    Исключения:
+        ValueError: Если имя хранилища неизвестно.
+    """
+    if name == 'none':
+        return None
+    if name == 'memory':
+        return MemoryCache(CACHE_MAXSIZE)
+    if name == 'redis':
+        import redis.asyncio
+
+        return RedisCache(redis.asyncio.from_url(CACHE_REDIS_URL))
+    raise ValueError(f"Неизвестный бэкенд кэша: {name}")
+
+
+read_cache = ReadCache(build_backend(CACHE_BACKEND), CACHE_TTL, CACHE_DISABLED_ROUTES)
@@ -5,28 +5,386 @@
 и определяет создателя сессий для создания асинхронных сессий базы данных.
 
 Функция `check_connection` проверяет подключение к базе данных, выполняя простой запрос.
+Функция `pool_status` возвращает текущее состояние пула соединений.
 Класс `Base` - это декларативный базовый класс для моделей SQLAlchemy.
+
+Параметры движка задаются переменными окружения (пустое значение означает
+значение по умолчанию для диалекта):
+- DB_ECHO: логировать каждый SQL-запрос (по умолчанию выключено).
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT: размер пула, число
+  дополнительных соединений сверх пула и время ожидания соединения.
+- DB_POOL_RECYCLE: через сколько секунд пересоздавать соединение.
+- DB_POOL_PRE_PING: проверять соединение перед выдачей из пула.
+- DB_QUERY_CACHE_SIZE: размер кэша скомпилированных запросов SQLAlchemy.
+- DB_STATEMENT_CACHE_SIZE: размер кэша подготовленных выражений asyncpg.
+- DB_EARLY_RELEASE: возвращать соединение в пул, как только обработчик
+  после чтения уступает цикл событий, если транзакция ничего не записывала
+  (по умолчанию выключено, см. `EarlyReleaseSession`).
+
+Режим высокой конкурентности для файловой SQLite (SQLITE_CONCURRENT=1):
+- при подключении включаются WAL, `synchronous=NORMAL`, `busy_timeout`,
+  `mmap_size` и `cache_size` (SQLITE_BUSY_TIMEOUT, SQLITE_MMAP_SIZE,
+  SQLITE_CACHE_SIZE);
+- все записи идут через отдельный движок с единственным соединением,
+  а чтения - через пул читателей (см. `RoutingSession`).
+
+Отдельной очереди записей и группового коммита нет: транзакции с записью
+по очереди ждут единственное соединение писателя в пуле, не дольше
+SQLITE_WRITER_TIMEOUT секунд (по умолчанию 10), после чего запрос
+завершается ошибкой. Соединение занято от первой записи до commit или
+rollback, поэтому обработчик, который между ними ждет чего-то еще, задерживает
+всех остальных писателей. Пропускную способность записи в зависимости от
+числа одновременных запросов показывает `python -m benchmarks.sqlite_writes`.
 """
 
+import asyncio
 import os
+import weakref
+from typing import Any, Dict, Optional
+
 import loguru
 
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Значения по умолчанию для диалектов. SQLite работает с локальным файлом,
+# поэтому проверка и пересоздание соединений ему не нужны.
+DIALECT_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'sqlite': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': -1,
+        'pool_pre_ping': False,
+    },
+    'postgresql': {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'statement_cache_size': 100,
+    },
+}
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# Допустимое переполнение, с которым создан движок, для `pool_status`
+_configured_max_overflow: 'weakref.WeakKeyDictionary[AsyncEngine, int]' = weakref.WeakKeyDictionary()
+
+
+def build_engine(database_url: str, **overrides: Any) -> AsyncEngine:
+    """
+    Создает асинхронный движок с настройками пула из переменных окружения.
+
+    Аргументы:
+        database_url (str): Строка подключения к базе данных.
+        **overrides: Параметры пула, имеющие приоритет над окружением.
+
+    Возвращает:
+        AsyncEngine: Настроенный асинхронный движок.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    defaults = DIALECT_DEFAULTS.get(backend, DIALECT_DEFAULTS['postgresql'])
+    options: Dict[str, Any] = {'echo': _env_flag('DB_ECHO', False)}
+
+    query_cache_size = _env_int('DB_QUERY_CACHE_SIZE', None)
+    if query_cache_size is not None:
+        options['query_cache_size'] = query_cache_size
+
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        # База в памяти существует только внутри одного соединения
+        options['poolclass'] = StaticPool
+        return create_async_engine(url, **options)
+
+    options.update(
+        pool_size=_env_int('DB_POOL_SIZE', defaults['pool_size']),
+        max_overflow=_env_int('DB_MAX_OVERFLOW', defaults['max_overflow']),
+        pool_timeout=_env_int('DB_POOL_TIMEOUT', defaults['pool_timeout']),
+        pool_recycle=_env_int('DB_POOL_RECYCLE', defaults['pool_recycle']),
+        pool_pre_ping=_env_flag('DB_POOL_PRE_PING', defaults['pool_pre_ping']),
+    )
+    options.update(overrides)
+    if url.get_driver_name() == 'asyncpg' and 'prepared_statement_cache_size' not in url.query:
+        cache_size = _env_int('DB_STATEMENT_CACHE_SIZE', defaults['statement_cache_size'])
+        url = url.update_query_dict({'prepared_statement_cache_size': str(cache_size)})
+    async_engine = create_async_engine(url, **options)
+    _configured_max_overflow[async_engine] = options['max_overflow']
+    return async_engine
+
+
+def build_sqlite_writer(database_url: str) -> AsyncEngine:
+    """
+    Создает движок-писатель SQLite с единственным соединением.
 
-SessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+    Транзакции с записью ждут это соединение не дольше SQLITE_WRITER_TIMEOUT
+    секунд (по умолчанию 10), затем возникает `sqlalchemy.exc.TimeoutError`.
+
+    Аргументы:
+        database_url (str): Строка подключения к файловой базе SQLite.
+
+    Возвращает:
+        AsyncEngine: Движок-писатель.
+    """
+    return build_engine(database_url, pool_size=1, max_overflow=0,
+                        pool_timeout=_env_int('SQLITE_WRITER_TIMEOUT', 10))
+
+
+def use_sqlite_pragmas(async_engine: AsyncEngine) -> None:
+    """
+    Включает для каждого нового соединения SQLite режим WAL и прагмы производительности.
+
+    WAL позволяет читателям работать параллельно с писателем, а
+    `synchronous=NORMAL` убирает fsync на каждый коммит: в режиме WAL файл
+    журнала синхронизируется с диском только при контрольных точках. При
+    сбое питания могут потеряться последние коммиты, но не целостность базы;
+    каждый коммит по-прежнему выполняется отдельно.
+
+    Аргументы:
+        async_engine (AsyncEngine): Движок, соединения которого настраиваются.
+    """
+    pragmas = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT', 5000)}",
+        f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        f"PRAGMA cache_size={_env_int('SQLITE_CACHE_SIZE', -64000)}",
+    )
+
+    @event.listens_for(async_engine.sync_engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class RoutingSession(Session):
+    """
+    Сессия, направляющая запись в движок-писатель, а чтение - в пул читателей.
+
+    Как только в транзакции появляется запись (flush или DML-выражение),
+    все последующие запросы этой транзакции тоже идут через писателя, чтобы
+    видеть собственные изменения. Движки передаются через `info` фабрики
+    сессий под ключами 'reader' и 'writer'.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info['use_writer'] = True
+        if self.info.get('use_writer'):
+            return self.info['writer'].sync_engine
+        return self.info['reader'].sync_engine
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('use_writer', None)
+
+
+class EarlyReleaseSession(AsyncSession):
+    """
+    Сессия, которая не держит соединение, пока обработчик занят другим.
+
+    Соединение, как и в обычной сессии, берется из пула только при первом
+    запросе. Если транзакция пока ничего не записывала (нет DML-выражений,
+    flush и ожидающих записи объектов), после чтения планируется ее
+    завершение на следующей итерации цикла событий. Пока обработчик сразу
+    выполняет следующий запрос, транзакция продолжается без лишнего COMMIT;
+    как только обработчик уступает цикл событий (ждет bcrypt, другой сервис
+    или отправку ответа), транзакция завершается и соединение возвращается
+    в пул, не дожидаясь закрытия сессии. Завершение чтения стоит один COMMIT,
+    которым заменяется ROLLBACK при возврате соединения в конце запроса.
+
+    Строки результатов асинхронной сессии уже прочитаны целиком, а объекты
+    после коммита не устаревают (`expire_on_commit=False`), поэтому
+    результатом можно пользоваться дальше. Следующая операция сессии
+    дожидается начатого завершения и открывает новую транзакцию; транзакция
+    с записью ведет себя как обычно до commit или rollback. Потоковая
+    выдача (`stream`) соединение не освобождает.
+
+    Это меняет изоляцию: чтения, между которыми обработчик уступал цикл
+    событий, выполняются в разных транзакциях и могут увидеть разные версии
+    данных. Поэтому режим включается явно (DB_EARLY_RELEASE=1). Ошибка
+    фонового COMMIT записывается в журнал и возвращается из `settle()`,
+    который `get_db` вызывает до отправки ответа, так что она достается
+    тому же запросу.
+    """
+    _release_handle: Optional[asyncio.Handle] = None
+    _releasing: Optional[asyncio.Task] = None
+
+    def _mark_writes(self, statement: Any = None) -> bool:
+        sync_session = self.sync_session
+        if (statement is not None and not getattr(statement, 'is_select', False)) or \
+                sync_session.new or sync_session.dirty or sync_session.deleted:
+            sync_session.info['write_transaction'] = True
+        return sync_session.info.get('write_transaction', False)
+
+    async def settle(self) -> None:
+        """
+        Отменяет запланированное завершение чтения или дожидается уже начатого.
+
+        Исключения:
+            SQLAlchemyError: Если фоновый COMMIT завершился ошибкой.
+        """
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+            self._release_handle = None
+        releasing = self._releasing
+        if releasing is not None:
+            try:
+                # Отмена запроса не должна прерывать COMMIT посередине
+                await asyncio.shield(releasing)
+            finally:
+                if releasing.done():
+                    self._releasing = None
+
+    def _schedule_release(self) -> None:
+        # scalars() вызывает execute(), поэтому завершение может быть уже запланировано
+        if self._release_handle is not None or self._mark_writes() or not self.sync_session.in_transaction():
+            return
+        self._release_handle = asyncio.get_running_loop().call_soon(self._start_release)
+
+    def _start_release(self) -> None:
+        self._release_handle = None
+        self._releasing = asyncio.ensure_future(self._release())
+
+    async def _release(self) -> None:
+        # Пока завершение ждало своей очереди, обработчик мог добавить объекты
+        if not self._mark_writes() and self.sync_session.in_transaction():
+            try:
+                await super().commit()
+            except Exception as e:
+                loguru.logger.error(f"Не удалось завершить транзакцию чтения: {e}")
+                raise
+
+    async def execute(self, statement, *args, **kwargs):
+        await self.settle()
+        self._mark_writes(statement)
+        result = await super().execute(statement, *args, **kwargs)
+        self._schedule_release()
+        return result
+
+    async def scalar(self, statement, *args, **kwargs):
+        await self.settle()
+        self._mark_writes(statement)
+        result = await super().scalar(statement, *args, **kwargs)
+        self._schedule_release()
+        return result
+
+    async def scalars(self, statement, *args, **kwargs):
+        await self.settle()
+        self._mark_writes(statement)
+        result = await super().scalars(statement, *args, **kwargs)
+        self._schedule_release()
+        return result
+
+    async def get(self, *args, **kwargs):
+        await self.settle()
+        result = await super().get(*args, **kwargs)
+        self._schedule_release()
+        return result
+
+    async def refresh(self, *args, **kwargs):
+        await self.settle()
+        await super().refresh(*args, **kwargs)
+        self._schedule_release()
+
+    async def stream(self, *args, **kwargs):
+        await self.settle()
+        return await super().stream(*args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        await self.settle()
+        await super().delete(*args, **kwargs)
+
+    async def connection(self, *args, **kwargs):
+        await self.settle()
+        return await super().connection(*args, **kwargs)
+
+    async def flush(self, *args, **kwargs):
+        await self.settle()
+        self._mark_writes()
+        await super().flush(*args, **kwargs)
+
+    async def commit(self):
+        await self.settle()
+        await super().commit()
+
+    async def rollback(self):
+        await self.settle()
+        await super().rollback()
+
+    async def close(self):
+        await self.settle()
+        await super().close()
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _reset_write_transaction(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('write_transaction', None)
+
+
+def build_sessionmaker(reader: AsyncEngine, writer: AsyncEngine | None = None,
+                       early_release: bool = False) -> async_sessionmaker:
+    """
+    Создает фабрику асинхронных сессий.
+
+    Аргументы:
+        reader (AsyncEngine): Основной движок (для чтения).
+        writer (AsyncEngine | None): Отдельный движок для записи, если используется.
+        early_release (bool): Возвращать соединение в пул после чтений, не дожидаясь
+            закрытия сессии (`EarlyReleaseSession`).
+
+    Возвращает:
+        async_sessionmaker: Фабрика сессий.
+    """
+    session_class = EarlyReleaseSession if early_release else AsyncSession
+    if writer is None:
+        return async_sessionmaker(bind=reader, class_=session_class, expire_on_commit=False)
+    return async_sessionmaker(
+        class_=session_class,
+        sync_session_class=RoutingSession,
+        info={'reader': reader, 'writer': writer},
+        expire_on_commit=False
+    )
+
+
+engine = build_engine(DATABASE_URL)
+writer_engine: AsyncEngine | None = None
+
+_url = make_url(DATABASE_URL)
+if (_env_flag('SQLITE_CONCURRENT', False) and _url.get_backend_name() == 'sqlite'
+        and _url.database not in (None, '', ':memory:')):
+    # Единственное соединение писателя сериализует запись без "database is locked"
+    writer_engine = build_sqlite_writer(DATABASE_URL)
+    use_sqlite_pragmas(engine)
+    use_sqlite_pragmas(writer_engine)
+
+SessionLocal = build_sessionmaker(engine, writer_engine, _env_flag('DB_EARLY_RELEASE', False))
 
 async def check_connection():
     """
@@ -46,6 +404,36 @@ async def check_connection():
     except Exception as e:
         loguru.logger.error(f"Ошибка подключения к базе данных: {e}")
 
+
+def _pool_stats(async_engine: AsyncEngine) -> Dict[str, Any]:
+    pool = async_engine.pool
+    stats: Dict[str, Any] = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=_configured_max_overflow.get(async_engine),
+        )
+    return stats
+
+
+def pool_status() -> Dict[str, Any]:
+    """
+    Возвращает текущее состояние пула соединений движка.
+
+    Возвращает:
+        Dict[str, Any]: Тип пула и, для пулов с очередью, размер пула,
+        число свободных и выданных соединений и текущее переполнение.
+        Если включен отдельный писатель SQLite, его пул описан в ключе 'writer'.
+    """
+    status = _pool_stats(engine)
+    if writer_engine is not None:
+        status['writer'] = _pool_stats(writer_engine)
+    return status
+
+
 class Base(DeclarativeBase):
     """
     Базовый класс для моделей SQLAlchemy.
@@ -8,7 +8,7 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from .db import SessionLocal
+from .db import EarlyReleaseSession, SessionLocal
 import loguru
 
 async def get_db() -> AsyncSession:
@@ -22,7 +22,8 @@ async def get_db() -> AsyncSession:
         AsyncSession: Асинхронная сессия базы данных.
 
     Исключения:
-        SQLAlchemyError: Возникает при ошибках SQLAlchemy.
+        SQLAlchemyError: Возникает при ошибках SQLAlchemy, в том числе при
+            ошибке фонового завершения транзакции чтения (DB_EARLY_RELEASE).
     """
     async with SessionLocal() as session:
         try:
@@ -30,4 +31,8 @@ async def get_db() -> AsyncSession:
         except SQLAlchemyError as e:
             loguru.logger.error(f"Произошла ошибка: {e}")
             await session.rollback()
-            raise
\ No newline at end of file
+            raise
+        if isinstance(session, EarlyReleaseSession):
+            # Завершение транзакции чтения идет в фоне; его ошибка должна
+            # достаться этому запросу до отправки ответа, а не следующему
+            await session.settle()
@@ -0,0 +1,96 @@
+"""
+Модуль условных запросов к задачам (ETag / If-None-Match).
+
+У каждого пользователя есть счетчик `tasks_version`, который увеличивается
+в той же транзакции, что и любое изменение его задач. ETag ответа строится
+из этого счетчика, поэтому для ответа 304 достаточно одного чтения строки
+пользователя по первичному ключу - таблица задач не затрагивается.
+"""
+
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+
+async def get_tasks_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    """
+    Возвращает текущую версию задач пользователя.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): Идентификатор пользователя.
+
+    Возвращает:
+        Optional[int]: Версия или None, если пользователь не найден.
+    """
+    return await db.scalar(select(User.tasks_version).where(User.id == user_id))
+
+
+async def bump_tasks_version(db: AsyncSession, user_id: int) -> None:
+    """
+    Увеличивает версию задач пользователя в текущей транзакции.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): Идентификатор пользователя.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tasks_version=User.tasks_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def make_etag(user_id: int, version: int) -> str:
+    """Строит слабый ETag для версии задач пользователя."""
+    return f'W/"t{user_id}.{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match по правилам слабого сравнения.
+
+    Аргументы:
+        if_none_match (Optional[str]): Значение заголовка запроса.
+        etag (str): Текущий ETag ресурса.
+
+    Возвращает:
+        bool: True, если клиентская копия актуальна.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def check_not_modified(user_id: int, version: Optional[int], request: Request,
+                       response: Response) -> Optional[Response]:
+    """
+    Выставляет ETag ответа и возвращает 304, если клиентская копия актуальна.
+
+    Версию нужно получать до выборки задач, чтобы ETag никогда не опережал
+    данные ответа.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя.
+        version (Optional[int]): Версия задач пользователя (None - пользователь не найден).
+        request (Request): Текущий запрос.
+        response (Response): Ответ, в который записывается ETag.
+
+    Возвращает:
+        Optional[Response]: Ответ 304 или None, если нужно отдать данные.
+    """
+    if version is None:
+        return None
+    etag = make_etag(user_id, version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return None
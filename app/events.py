@@ -0,0 +1,310 @@
+"""
+Модуль ленты изменений задач для подписчиков (Server-Sent Events).
+
+Обработчики записи после коммита публикуют события `created`, `updated`
+и `deleted`, а брокер раздает их подписчикам того же пользователя.
+Каждое событие получает возрастающий номер, который клиент передает
+в заголовке `Last-Event-ID` при переподключении: пропущенные события
+досылаются из кольцевого буфера последних EVENTS_HISTORY_SIZE событий.
+Если нужные события уже вытеснены из буфера или подписчик не успевает
+читать и его очередь (EVENTS_QUEUE_SIZE) переполнена, вместо них
+отправляется одно событие `reset`: клиент должен заново загрузить
+список задач. Так память ограничена и для медленных клиентов.
+
+Поддерживаются два способа доставки:
+- без бэкенда события раздаются внутри процесса, номера начинаются заново
+  при перезапуске;
+- `RedisEvents`: события публикуются в канал Redis и доходят до подписчиков
+  всех воркеров, номера выдаются общим счетчиком. Подходит любой клиент,
+  совместимый с `redis.asyncio` (в тестах его можно заменить подделкой).
+
+Настройки (переменные окружения):
+- EVENTS_BACKEND: 'memory' (по умолчанию) или 'redis'.
+- EVENTS_REDIS_URL: адрес Redis для бэкенда 'redis'.
+- EVENTS_HISTORY_SIZE: размер буфера для `Last-Event-ID` (по умолчанию 1000).
+- EVENTS_QUEUE_SIZE: размер очереди одного подписчика (по умолчанию 100).
+- EVENTS_HEARTBEAT: интервал комментариев-пингов в секундах (по умолчанию 15).
+"""
+
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, NamedTuple, Optional, Set
+
+import loguru
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'memory')
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+EVENTS_HISTORY_SIZE = int(os.getenv('EVENTS_HISTORY_SIZE', '1000'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', '15'))
+
+
+class TaskEvent(NamedTuple):
+    """
+    Событие изменения задач.
+
+    Атрибуты:
+        id (int): Номер события.
+        user_id (int): Владелец задачи.
+        type (str): 'created', 'updated', 'deleted' или 'reset'.
+        data (dict): Данные задачи (для 'deleted' - только id).
+    """
+    id: int
+    user_id: int
+    type: str
+    data: dict
+
+    def encode(self) -> str:
+        """Возвращает событие в формате text/event-stream."""
+        return f'id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, ensure_ascii=False)}\n\n'
+
+
+class Subscription:
+    """
+    Очередь событий одного подключения.
+
+    Атрибуты:
+        user_id (int): Пользователь, события которого получает подписчик.
+        queue (asyncio.Queue): Очередь ограниченного размера.
+    """
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def push(self, event: TaskEvent) -> None:
+        """
+        Кладет событие в очередь.
+
+        При переполнении очередь очищается и заменяется одним событием
+        `reset` с номером последнего события.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(TaskEvent(event.id, self.user_id, 'reset', {}))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[TaskEvent]:
+        """Возвращает следующее событие или None, если за `timeout` секунд событий не было."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBackend(ABC):
+    """Интерфейс доставки событий между воркерами."""
+
+    @abstractmethod
+    async def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        """Публикует событие; номер назначает бэкенд."""
+
+    @abstractmethod
+    async def listen(self, deliver: Callable[[TaskEvent], None]) -> None:
+        """Передает в `deliver` события всех воркеров, пока задача не будет отменена."""
+
+
+# Номер события и публикация выполняются атомарно, поэтому номера в канале идут по порядку
+PUBLISH_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', KEYS[2], id .. ' ' .. ARGV[1])
+return id
+"""
+
+
+class RedisEvents(EventBackend):
+    """
+    Доставка событий через канал Redis.
+
+    Аргументы:
+        client: Клиент с асинхронными методами eval и pubsub, совместимый с `redis.asyncio.Redis`.
+        channel (str): Имя канала.
+    """
+
+    def __init__(self, client: Any, channel: str = 'task_events'):
+        self.client = client
+        self.channel = channel
+
+    async def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        payload = json.dumps({'user_id': user_id, 'type': event_type, 'data': data}, ensure_ascii=False)
+        await self.client.eval(PUBLISH_SCRIPT, 2, f'{self.channel}:id', self.channel, payload)
+
+    async def listen(self, deliver: Callable[[TaskEvent], None]) -> None:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                raw = message['data']
+                event_id, payload = (raw.decode() if isinstance(raw, bytes) else raw).split(' ', 1)
+                payload = json.loads(payload)
+                deliver(TaskEvent(int(event_id), payload['user_id'], payload['type'], payload['data']))
+        finally:
+            await pubsub.unsubscribe(self.channel)
+
+
+class EventBroker:
+    """
+    Раздача событий подписчикам внутри процесса.
+
+    Атрибуты:
+        backend (Optional[EventBackend]): Доставка между воркерами; None - только этот процесс.
+        history_size (int): Размер буфера последних событий.
+        queue_size (int): Размер очереди одного подписчика.
+        last_id (int): Номер последнего известного события.
+    """
+
+    def __init__(self, backend: Optional[EventBackend], history_size: int, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.history: Deque[TaskEvent] = deque(maxlen=history_size)
+        self.last_id = 0
+        # Все события с номером больше horizon есть в буфере; None - пока неизвестно
+        self.horizon: Optional[int] = 0 if backend is None else None
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        """
+        Публикует событие для подписчиков пользователя.
+
+        Вызывается после коммита. Ошибка доставки не отменяет изменение,
+        а только записывается в журнал.
+        """
+        if self.backend is None:
+            self.deliver(TaskEvent(self.last_id + 1, user_id, event_type, data))
+            return
+        try:
+            await self.backend.publish(user_id, event_type, data)
+        except Exception as e:
+            loguru.logger.warning(f"Не удалось опубликовать событие {event_type} задачи: {e}")
+
+    def deliver(self, event: TaskEvent) -> None:
+        """Сохраняет событие в буфере и раздает его подписчикам владельца."""
+        if self.horizon is None:
+            self.horizon = event.id - 1
+        if len(self.history) == self.history.maxlen:
+            self.horizon = self.history[0].id
+        self.history.append(event)
+        self.last_id = max(self.last_id, event.id)
+        for subscription in self._subscribers.get(event.user_id, ()):
+            subscription.push(event)
+
+    def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Подписывает на события пользователя.
+
+        Аргументы:
+            user_id (int): Идентификатор пользователя.
+            last_event_id (Optional[int]): Номер последнего полученного клиентом события.
+
+        Возвращает:
+            Subscription: Очередь, в которую уже положены пропущенные события
+            или событие `reset`, если их нельзя восстановить.
+        """
+        self._ensure_listening()
+        subscription = Subscription(user_id, self.queue_size)
+        if last_event_id is not None and last_event_id != self.last_id:
+            if self.horizon is None or not self.horizon <= last_event_id <= self.last_id:
+                subscription.push(TaskEvent(self.last_id, user_id, 'reset', {}))
+            else:
+                for event in self.history:
+                    if event.id > last_event_id and event.user_id == user_id:
+                        subscription.push(event)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Отписывает подключение."""
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def _ensure_listening(self) -> None:
+        """Запускает прием событий бэкенда (заново, если прием завершился с ошибкой)."""
+        if self.backend is None or (self._listener is not None and not self._listener.done()):
+            return
+        self.horizon = None
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        try:
+            await self.backend.listen(self.deliver)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            loguru.logger.warning(f"Прием событий задач остановлен: {e}")
+            # Подписчики могли пропустить события
+            for subscriptions in self._subscribers.values():
+                for subscription in subscriptions:
+                    subscription.push(TaskEvent(self.last_id, subscription.user_id, 'reset', {}))
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает число подписчиков, номер последнего события и заполнение буфера."""
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'subscribers': sum(len(subscriptions) for subscriptions in self._subscribers.values()),
+            'last_event_id': self.last_id,
+            'history': len(self.history),
+        }
+
+
+async def event_stream(broker: EventBroker, user_id: int, last_event_id: Optional[int] = None,
+                       heartbeat: float = EVENTS_HEARTBEAT) -> AsyncIterator[str]:
+    """
+    Формирует поток text/event-stream событий пользователя.
+
+    Подписка создается при начале отправки ответа. Пока событий нет, каждые
+    `heartbeat` секунд отправляется комментарий, чтобы прокси не закрыли
+    соединение. При отключении клиента генератор закрывается и подписка удаляется.
+
+    Аргументы:
+        broker (EventBroker): Брокер событий.
+        user_id (int): Идентификатор пользователя.
+        last_event_id (Optional[int]): Номер последнего полученного клиентом события.
+        heartbeat (float): Интервал пингов в секундах.
+    """
+    subscription = broker.subscribe(user_id, last_event_id)
+    try:
+        yield f'retry: {int(heartbeat * 1000)}\n\n'
+        while True:
+            event = await subscription.get(heartbeat)
+            yield event.encode() if event is not None else ': ping\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def build_backend(name: str) -> Optional[EventBackend]:
+    """
+    Создает бэкенд доставки событий по имени из настроек.
+
+    Аргументы:
+        name (str): 'memory' или 'redis'.
+
+    Возвращает:
+        Optional[EventBackend]: Бэкенд или None для доставки внутри процесса.
+
+    Исключения:
+        ValueError: Если имя бэкенда неизвестно.
+    """
+    if name == 'memory':
+        return None
+    if name == 'redis':
+        import redis.asyncio
+
+        return RedisEvents(redis.asyncio.from_url(EVENTS_REDIS_URL))
+    raise ValueError(f"Неизвестный бэкенд событий: {name}")
+
+
+task_events = EventBroker(build_backend(EVENTS_BACKEND), EVENTS_HISTORY_SIZE, EVENTS_QUEUE_SIZE)
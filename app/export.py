@@ -0,0 +1,79 @@
+"""
+Модуль потоковой выгрузки строк из базы данных в NDJSON и CSV.
+
+Строки читаются серверным курсором (`AsyncSession.stream`) порциями по
+`EXPORT_CHUNK_SIZE` и сразу кодируются в текст, поэтому расход памяти не
+зависит от общего числа строк.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator, Literal, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPORT_CHUNK_SIZE = 1000
+
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def encode_ndjson(columns: Sequence[str], rows: Sequence[Sequence]) -> str:
+    """
+    Кодирует порцию строк в NDJSON (один JSON-объект на строку).
+
+    Аргументы:
+        columns (Sequence[str]): Имена колонок.
+        rows (Sequence[Sequence]): Строки результата.
+
+    Возвращает:
+        str: Текст порции.
+    """
+    return ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+
+
+def encode_csv(rows: Sequence[Sequence]) -> str:
+    """
+    Кодирует порцию строк в CSV.
+
+    Аргументы:
+        rows (Sequence[Sequence]): Строки результата (или строка заголовка).
+
+    Возвращает:
+        str: Текст порции.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_rows(db: AsyncSession, query: Select, export_format: ExportFormat) -> AsyncIterator[str]:
+    """
+    Построчно выгружает результат запроса в заданном формате.
+
+    Генератор выполняется уже после завершения обработчика, поэтому сам
+    закрывает сессию, когда выгрузка закончена или прервана клиентом.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        query (Select): Запрос, возвращающий строки для выгрузки.
+        export_format (ExportFormat): 'ndjson' или 'csv'.
+
+    Возвращает:
+        AsyncIterator[str]: Части ответа.
+    """
+    try:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        columns = list(result.keys())
+        if export_format == 'csv':
+            yield encode_csv([columns])
+        async for rows in result.partitions():
+            yield encode_csv(rows) if export_format == 'csv' else encode_ndjson(columns, rows)
+    finally:
+        await db.close()
@@ -0,0 +1,64 @@
+"""
+Модуль быстрого пути сериализации списков.
+
+По умолчанию FastAPI прогоняет каждую ORM-строку через модель ответа
+(`List[ReadTask]`), затем через `jsonable_encoder` и стандартный `json`.
+При включенном FAST_JSON_RESPONSES обработчики списков выбирают только нужные
+колонки, собирают словари прямо из кортежей строк и отдают их через
+`ORJSONResponse`, минуя гидратацию ORM-объектов и повторную валидацию.
+Ключи и типы значений совпадают с моделями ответа, поэтому JSON-схема для
+клиентов не меняется.
+
+Если orjson не установлен, используется стандартный `JSONResponse`.
+"""
+
+import os
+from typing import Any, Dict, List, Sequence
+
+from dotenv import load_dotenv
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson входит в fastapi[all]
+    orjson = None
+
+load_dotenv()
+
+FAST_JSON_RESPONSES = os.getenv('FAST_JSON_RESPONSES', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+FastResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def rows_as_dicts(rows: Sequence[Row]) -> List[Dict[str, Any]]:
+    """
+    Превращает строки результата в словари без создания ORM-объектов.
+
+    Аргументы:
+        rows (Sequence[Row]): Строки запроса по отдельным колонкам.
+
+    Возвращает:
+        List[Dict[str, Any]]: Словари "колонка - значение".
+    """
+    return [row._asdict() for row in rows]
+
+
+def fast_json_response(content: Any, response: Response) -> Response:
+    """
+    Кодирует готовые данные быстрым кодировщиком без валидации моделью ответа.
+
+    Заголовки, выставленные обработчиком во внедренный `response`
+    (ETag, X-Next-Cursor), переносятся в итоговый ответ.
+
+    Аргументы:
+        content (Any): JSON-совместимые данные.
+        response (Response): Внедренный FastAPI объект ответа обработчика.
+
+    Возвращает:
+        Response: Готовый ответ.
+    """
+    fast_response = FastResponse(content)
+    fast_response.headers.raw.extend(response.headers.raw)
+    return fast_response
@@ -0,0 +1,129 @@
+"""
+Модуль хеширования паролей.
+
+bcrypt намеренно медленный (порядка 250 мс на операцию при стоимости 12),
+поэтому хеширование и проверка паролей выполняются в отдельном ограниченном
+пуле потоков и не блокируют цикл событий. Библиотека bcrypt освобождает GIL
+на время вычислений, так что потоки пула работают параллельно.
+
+Настройки (переменные окружения):
+- BCRYPT_ROUNDS: стоимость bcrypt (по умолчанию 12).
+- HASH_WORKERS: число одновременных операций хеширования.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+
+from app.metrics import METRICS_ENABLED, metrics
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """
+    Исполнитель операций bcrypt в выделенном пуле потоков.
+
+    Атрибуты:
+        max_workers (int): Максимальное число одновременных операций.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int):
+        self.max_workers = max_workers
+        self._context = context
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def _run(self, func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            started = time.perf_counter()
+            return func(*args), time.perf_counter() - started
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _on_done(self, future: Future) -> None:
+        # Задача, отмененная до запуска, так и не покинула очередь
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def _submit(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._queued += 1
+        future = self._executor.submit(self._run, func, *args)
+        future.add_done_callback(self._on_done)
+        result, elapsed = await asyncio.wrap_future(future)
+        # Время записывается уже в цикле событий, где живут метрики
+        if METRICS_ENABLED:
+            metrics.observe('bcrypt_duration_seconds', (operation,), elapsed)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """
+        Хеширует пароль, не блокируя цикл событий.
+
+        Аргументы:
+            password (str): Пароль в открытом виде.
+
+        Возвращает:
+            str: Хеш пароля.
+        """
+        return await self._submit('hash', self._context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль по хешу, не блокируя цикл событий.
+
+        Аргументы:
+            password (str): Пароль в открытом виде.
+            hashed_password (str): Сохраненный хеш.
+
+        Возвращает:
+            bool: True, если пароль совпадает.
+        """
+        return await self._submit('verify', self._context.verify, password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает текущее состояние пула.
+
+        Возвращает:
+            Dict[str, int]: Глубина очереди, число выполняемых операций и настройки пула.
+        """
+        with self._lock:
+            return {
+                'queue_depth': self._queued,
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'rounds': BCRYPT_ROUNDS,
+            }
+
+
+password_hasher = PasswordHasher(bcrypt_context, HASH_WORKERS)
+
+
+async def hash_password(password: str) -> str:
+    """Хеширует пароль в пуле `password_hasher`."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Проверяет пароль в пуле `password_hasher`."""
+    return await password_hasher.verify(password, hashed_password)
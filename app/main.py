@@ -2,11 +2,21 @@
 Основной модуль приложения FastAPI.
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.responses import PlainTextResponse
 
 from app.routers import users
 from app.routers import tasks
 from app.routers import auth
+from app.database.db import pool_status
+from app.cache import read_cache
+from app.events import task_events
+from app.hashing import password_hasher
+from app.metrics import CONTENT_TYPE, METRICS_ENABLED, MetricsMiddleware, metrics, render
+from app import profiling
+from app.profiling import (PROFILE_HEADER_ENABLED, PROFILE_SAMPLE_RATE, SLOW_QUERY_MS, ProfilingMiddleware,
+                           SlowQueryRouteMiddleware, recent_slow_queries)
+from app.utils import get_current_user, token_cache
 
 app = FastAPI(
     title="Task Management API",
@@ -16,6 +26,32 @@ app = FastAPI(
 app.include_router(users.router)
 app.include_router(tasks.router)
 app.include_router(auth.router)
+if SLOW_QUERY_MS > 0:
+    app.add_middleware(SlowQueryRouteMiddleware)
+if PROFILE_HEADER_ENABLED or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+def runtime_gauges():
+    """Текущее состояние пулов соединений, хеширования, подписок на события и кэша токенов для `/metrics`."""
+    pools = pool_status()
+    writer = pools.pop('writer', None)
+    gauges = {}
+    for engine_name, stats in (('reader', pools), ('writer', writer)):
+        for key, value in (stats or {}).items():
+            if isinstance(value, int):
+                gauges.setdefault(f'db_pool_{key}', {})[(('engine', engine_name),)] = value
+    for key, value in password_hasher.stats().items():
+        gauges[f'bcrypt_pool_{key}'] = {(): value}
+    gauges['task_events_subscribers'] = {(): task_events.stats()['subscribers']}
+    for key, value in token_cache.stats().items():
+        gauges[f'token_cache_{key}'] = {(): value}
+    return gauges
+
+
+metrics.add_gauge_source(runtime_gauges)
 
 
 @app.get('/')
@@ -32,3 +68,54 @@ async def health_check():
         "status": "healthy",
         "version": "1.0.0"
     }
+
+
+@app.get('/health/pool')
+async def pool_health():
+    """
+    Точка доступа для наблюдения за пулом соединений с базой данных.
+
+    Возвращает тип пула, его размер, число свободных и выданных соединений
+    и текущее переполнение. Используется для подбора размера пула под
+    количество рабочих процессов.
+    """
+    return pool_status()
+
+
+@app.get('/health/cache')
+async def cache_health():
+    """
+    Точка доступа для наблюдения за кэшем чтений.
+
+    Возвращает тип хранилища, число попаданий, промахов и вытеснений
+    и долю попаданий.
+    """
+    return read_cache.stats()
+
+
+@app.get('/health/slow-queries')
+async def slow_queries_health(user: dict = Depends(get_current_user)):
+    """
+    Точка доступа для просмотра последних медленных SQL-запросов.
+
+    Возвращает текст запроса, число параметров (без значений), длительность
+    в миллисекундах и маршрут, из которого запрос был выполнен (самые новые
+    первыми). Требует авторизации и включается настройкой
+    SLOW_QUERY_ENDPOINT_ENABLED, иначе отвечает 404.
+    """
+    if not profiling.SLOW_QUERY_ENDPOINT_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Журнал медленных запросов отключен")
+    return recent_slow_queries()
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics_endpoint():
+    """
+    Точка доступа для сбора метрик Prometheus.
+
+    Возвращает счетчики и гистограммы запросов, время работы с базой данных,
+    bcrypt и проверки токенов, а также состояние пулов. При нескольких
+    воркерах и заданном METRICS_MULTIPROC_DIR значения объединяются по всем
+    живым процессам (настройки пулов - максимумом, остальное - суммой).
+    """
+    return PlainTextResponse(render(metrics.collect()), media_type=CONTENT_TYPE)
@@ -0,0 +1,462 @@
+"""
+Модуль метрик приложения в текстовом формате Prometheus.
+
+Собираются:
+- число запросов, гистограммы времени ответа и число запросов в обработке
+  по шаблону маршрута (`/task/{task_id}`, а не конкретный путь);
+- число SQL-запросов и суммарное время в базе данных на один HTTP-запрос;
+- время операций bcrypt и проверки токенов доступа;
+- состояние пула соединений и пула хеширования (на момент снятия метрик).
+
+Все обновления выполняются в потоке цикла событий (операции bcrypt
+возвращают свое время в цикл событий), поэтому счетчики изменяются без
+блокировок.
+
+У каждого рабочего процесса свои счетчики. Если задан METRICS_MULTIPROC_DIR,
+процесс периодически сохраняет снимок своих метрик в файл `<pid>.json`
+в этом каталоге, а `/metrics` любого процесса объединяет все снимки:
+счетчики и гистограммы суммируются, датчики - по правилу из `GAUGES`
+(занятость пулов складывается, а настройки вроде размера пула берутся
+как максимум, иначе они выросли бы в число воркеров раз).
+
+Снимок собирается в цикле событий, а кодирование в JSON и запись файла
+выполняет фоновый поток, поэтому обработка запросов не ждет диска. Пока
+новых данных нет, поток раз в METRICS_FLUSH_INTERVAL обновляет время
+изменения файла. Снимки завершившихся процессов и файлы, не обновлявшиеся
+дольше STALE_FLUSH_INTERVALS периодов, удаляются при сборе метрик; после
+этого суммы счетчиков уменьшаются, и Prometheus считает это сбросом
+счетчика. Сам `/metrics` читает снимки других процессов синхронно.
+
+Настройки (переменные окружения):
+- METRICS_ENABLED: включает сбор метрик (по умолчанию 1).
+- METRICS_MULTIPROC_DIR: общий каталог снимков для нескольких воркеров.
+- METRICS_FLUSH_INTERVAL: период сохранения снимка в секундах (по умолчанию 5).
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on')
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Через сколько периодов сохранения без обновления снимок считается брошенным
+STALE_FLUSH_INTERVALS = 3
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TOKEN_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+# Имя метрики -> (описание, имена меток)
+COUNTERS = {
+    'http_requests_total': ("Число обработанных HTTP-запросов", ('method', 'route', 'status')),
+    'db_queries_total': ("Число выполненных SQL-запросов", ()),
+    'login_throttled_total': ("Число отклоненных попыток входа", ('scope',)),
+}
+# Имя метрики -> (описание, имена меток, границы корзин)
+HISTOGRAMS = {
+    'http_request_duration_seconds': (
+        "Время обработки HTTP-запроса", ('method', 'route'), LATENCY_BUCKETS),
+    'http_request_db_queries': (
+        "Число SQL-запросов на один HTTP-запрос", ('method', 'route'), QUERY_COUNT_BUCKETS),
+    'http_request_db_duration_seconds': (
+        "Суммарное время SQL-запросов одного HTTP-запроса", ('method', 'route'), LATENCY_BUCKETS),
+    'bcrypt_duration_seconds': ("Время операции bcrypt", ('operation',), BCRYPT_BUCKETS),
+    'token_verification_duration_seconds': ("Время проверки токена доступа", (), TOKEN_BUCKETS),
+}
+# Имя метрики -> (описание, объединение снимков воркеров: 'sum' или 'max')
+GAUGES = {
+    'http_requests_in_flight': ("Число HTTP-запросов в обработке", 'sum'),
+    'db_pool_size': ("Размер пула соединений одного воркера", 'max'),
+    'db_pool_checked_in': ("Свободные соединения пула", 'sum'),
+    'db_pool_checked_out': ("Выданные соединения пула", 'sum'),
+    'db_pool_overflow': ("Текущее переполнение пула", 'sum'),
+    'db_pool_max_overflow': ("Допустимое переполнение пула одного воркера", 'max'),
+    'bcrypt_pool_queue_depth': ("Операции bcrypt в очереди", 'sum'),
+    'bcrypt_pool_running': ("Выполняемые операции bcrypt", 'sum'),
+    'bcrypt_pool_max_workers': ("Размер пула bcrypt одного воркера", 'max'),
+    'bcrypt_pool_rounds': ("Стоимость bcrypt", 'max'),
+    'task_events_subscribers': ("Открытые подписки на ленту изменений задач", 'sum'),
+    'token_cache_hits': ("Попадания в кэш проверенных токенов с запуска процесса", 'sum'),
+    'token_cache_misses': ("Промахи кэша проверенных токенов с запуска процесса", 'sum'),
+    'token_cache_size': ("Записи в кэше проверенных токенов", 'sum'),
+}
+
+Labels = Tuple[str, ...]
+GaugeSource = Callable[[], Dict[str, Dict[Tuple[Tuple[str, Any], ...], float]]]
+
+
+class RequestStats:
+    """
+    Статистика обращений к базе данных в рамках одного HTTP-запроса.
+
+    Атрибуты:
+        scope (dict): ASGI-scope запроса (после маршрутизации содержит маршрут).
+        queries (int): Число выполненных SQL-запросов.
+        db_time (float): Суммарное время SQL-запросов в секундах.
+    """
+    __slots__ = ('scope', 'queries', 'db_time')
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def route_template(scope: dict) -> str:
+    """
+    Возвращает шаблон пути маршрута, обработавшего запрос.
+
+    Неизвестные пути сводятся к одной метке 'unmatched', чтобы не раздувать
+    число серий метрик.
+    """
+    return getattr(scope.get('route'), 'path_format', 'unmatched')
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (счетчики не накопительные)."""
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Хранилище метрик одного процесса.
+
+    Аргументы:
+        directory (Optional[str]): Каталог снимков для нескольких воркеров.
+        flush_interval (float): Период сохранения снимка в секундах.
+
+    Атрибуты:
+        in_flight (int): Число HTTP-запросов в обработке.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.in_flight = 0
+        self._counters: Dict[str, Dict[Labels, float]] = {name: {} for name in COUNTERS}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {name: {} for name in HISTOGRAMS}
+        self._gauge_sources: List[GaugeSource] = []
+        self._next_flush = 0.0
+        # Снимок, ожидающий записи фоновым потоком
+        self._pending: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """Увеличивает счетчик `name` с метками `labels`."""
+        series = self._counters[name]
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Добавляет наблюдение в гистограмму `name` с метками `labels`."""
+        series = self._histograms[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(HISTOGRAMS[name][2])
+        histogram.observe(value)
+
+    def add_gauge_source(self, source: GaugeSource) -> None:
+        """
+        Регистрирует функцию, возвращающую текущие значения датчиков.
+
+        Функция вызывается при снятии метрик и возвращает словарь
+        `{имя метрики: {метки: значение}}`; метки передаются кортежем пар
+        `(имя, значение)`.
+        """
+        self._gauge_sources.append(source)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает JSON-совместимый снимок метрик процесса."""
+        gauges: Dict[str, List] = {'http_requests_in_flight': [[[], self.in_flight]]}
+        for source in self._gauge_sources:
+            for name, series in source().items():
+                gauges.setdefault(name, []).extend([[list(map(list, pairs)), value] for pairs, value in series.items()])
+        return {
+            'counters': {name: [[list(labels), value] for labels, value in series.items()]
+                         for name, series in self._counters.items()},
+            'histograms': {name: [[list(labels), list(h.counts), h.sum] for labels, h in series.items()]
+                           for name, series in self._histograms.items()},
+            'gauges': gauges,
+        }
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, f'{os.getpid()}.json')
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        path = self._snapshot_path()
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(data, file)
+        os.replace(f'{path}.tmp', path)
+
+    def flush(self) -> None:
+        """Синхронно сохраняет снимок метрик процесса в общий каталог (при завершении процесса)."""
+        if self.directory is None:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        self._write(self.snapshot())
+
+    def maybe_flush(self) -> None:
+        """
+        Передает снимок фоновому потоку записи, если с прошлого сохранения
+        прошло больше `flush_interval`.
+        """
+        if self.directory is None or time.monotonic() < self._next_flush:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        with self._lock:
+            self._pending = self.snapshot()
+        # Поток не переживает fork, поэтому в воркере он запускается при первом сохранении
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True)
+            self._writer.start()
+        self._wakeup.set()
+
+    def _write_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._lock:
+                data, self._pending = self._pending, None
+            try:
+                if data is not None:
+                    self._write(data)
+                else:
+                    # Процесс жив, но запросов не было: снимок не должен считаться брошенным
+                    os.utime(self._snapshot_path())
+            except OSError:
+                continue
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Возвращает метрики всех процессов.
+
+        Без общего каталога возвращается снимок текущего процесса, иначе он
+        объединяется со снимками остальных воркеров. Снимки завершившихся
+        и давно не обновлявшихся процессов удаляются.
+        """
+        if self.directory is None:
+            return self.snapshot()
+        own = f'{os.getpid()}.json'
+        stale_before = time.time() - STALE_FLUSH_INTERVALS * self.flush_interval
+        snapshots = [self.snapshot()]
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json') or entry.name == own:
+                continue
+            try:
+                if not _process_exists(int(entry.name[:-len('.json')])) or entry.stat().st_mtime < stale_before:
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # Файл удален или еще не дописан другим процессом
+                continue
+        return merge_snapshots(snapshots)
+
+
+def _process_exists(pid: int) -> bool:
+    """Проверяет, что процесс с таким PID еще существует."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю
+        return True
+    return True
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Объединяет снимки метрик нескольких процессов.
+
+    Счетчики и гистограммы суммируются, датчики - суммой или максимумом
+    в зависимости от правила в `GAUGES`.
+
+    Аргументы:
+        snapshots (Iterable[Dict[str, Any]]): Снимки, созданные `MetricsRegistry.snapshot`.
+
+    Возвращает:
+        Dict[str, Any]: Снимок того же формата с объединенными значениями по одинаковым меткам.
+    """
+    counters: Dict[str, Dict[tuple, float]] = {}
+    histograms: Dict[str, Dict[tuple, list]] = {}
+    gauges: Dict[str, Dict[tuple, float]] = {}
+    for snapshot in snapshots:
+        for name, series in snapshot['counters'].items():
+            target = counters.setdefault(name, {})
+            for labels, value in series:
+                target[tuple(labels)] = target.get(tuple(labels), 0) + value
+        for name, series in snapshot['gauges'].items():
+            target = gauges.setdefault(name, {})
+            merge_max = name in GAUGES and GAUGES[name][1] == 'max'
+            for pairs, value in series:
+                key = tuple(map(tuple, pairs))
+                if key not in target:
+                    target[key] = value
+                else:
+                    target[key] = max(target[key], value) if merge_max else target[key] + value
+        for name, series in snapshot['histograms'].items():
+            target = histograms.setdefault(name, {})
+            for labels, counts, total in series:
+                current = target.setdefault(tuple(labels), [[0] * len(counts), 0.0])
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+    return {
+        'counters': {name: [[list(labels), value] for labels, value in series.items()]
+                     for name, series in counters.items()},
+        'histograms': {name: [[list(labels), counts, total] for labels, (counts, total) in series.items()]
+                       for name, series in histograms.items()},
+        'gauges': {name: [[[list(pair) for pair in labels], value] for labels, value in series.items()]
+                   for name, series in gauges.items()},
+    }
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, Any]]) -> str:
+    rendered = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f'{{{rendered}}}' if rendered else ''
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(data: Dict[str, Any]) -> str:
+    """
+    Преобразует снимок метрик в текстовый формат Prometheus.
+
+    Аргументы:
+        data (Dict[str, Any]): Снимок, созданный `snapshot` или `collect`.
+
+    Возвращает:
+        str: Текст для ответа `/metrics`.
+    """
+    lines = []
+    for name, (description, label_names) in COUNTERS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        for labels, value in data['counters'].get(name, []):
+            lines.append(f'{name}{_format_labels(zip(label_names, labels))} {_format_number(value)}')
+    for name, (description, label_names, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for labels, counts, total in data['histograms'].get(name, []):
+            pairs = list(zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip([*map(_format_number, buckets), '+Inf'], counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(pairs + [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(pairs)} {_format_number(total)}')
+            lines.append(f'{name}_count{_format_labels(pairs)} {cumulative}')
+    for name, series in data['gauges'].items():
+        lines += [f'# HELP {name} {GAUGES[name][0] if name in GAUGES else name}', f'# TYPE {name} gauge']
+        for pairs, value in series:
+            lines.append(f'{name}{_format_labels(pairs)} {_format_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, измеряющее каждый HTTP-запрос.
+
+    Аргументы:
+        app: Следующее ASGI-приложение.
+        registry (MetricsRegistry): Хранилище метрик.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            request_stats.reset(token)
+            labels = (scope['method'], route_template(scope))
+            registry.inc('http_requests_total', (*labels, str(status_code)))
+            registry.observe('http_request_duration_seconds', labels, elapsed)
+            registry.observe('http_request_db_queries', labels, stats.queries)
+            registry.observe('http_request_db_duration_seconds', labels, stats.db_time)
+            registry.maybe_flush()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    metrics.inc('db_queries_total')
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+def instrument_engines() -> None:
+    """Подписывает подсчет SQL-запросов на события всех движков SQLAlchemy."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def observe_duration(name: str, labels: Labels, started: float) -> None:
+    """Записывает в гистограмму `name` время, прошедшее с `started` (perf_counter)."""
+    if METRICS_ENABLED:
+        metrics.observe(name, labels, time.perf_counter() - started)
+
+
+metrics = MetricsRegistry(METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL)
+if METRICS_ENABLED:
+    instrument_engines()
+    # Последний снимок процесса фиксирует нулевое число запросов в обработке
+    atexit.register(metrics.flush)
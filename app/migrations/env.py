@@ -21,7 +21,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.database.db import Base
-from app.models import users, tasks
+from app.models import users, tasks, tokens, stats
 target_metadata = Base.metadata
 
 
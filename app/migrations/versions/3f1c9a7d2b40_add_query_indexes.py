@@ -0,0 +1,32 @@
+"""Add indexes for task and user query paths
+
+Revision ID: 3f1c9a7d2b40
+Revises: 7635882b7ff9
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b40'
+down_revision: Union[str, None] = '7635882b7ff9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_id_id', 'tasks', ['user_id', 'id'], unique=False)
+    op.create_index('ix_tasks_user_id_status', 'tasks', ['user_id', 'status'], unique=False)
+    op.create_index('ix_tasks_title', 'tasks', ['title'], unique=False)
+    op.create_index('ix_users_name', 'users', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_name', table_name='users')
+    op.drop_index('ix_tasks_title', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_status', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_id', table_name='tasks')
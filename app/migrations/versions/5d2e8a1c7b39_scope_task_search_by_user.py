@@ -0,0 +1,85 @@
+"""Scope the full-text task search index by user
+
+Revision ID: 5d2e8a1c7b39
+Revises: a4c81f37d2e9
+Create Date: 2026-10-18 23:12:37.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a1c7b39'
+down_revision: Union[str, None] = 'a4c81f37d2e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Триггеры и таблица FTS5 ревизии f18c6e0b93a5, которые заменяются на версию с user_id
+DROP_SQLITE_INDEX = (
+    "DROP TRIGGER IF EXISTS tasks_fts_insert",
+    "DROP TRIGGER IF EXISTS tasks_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_fts_update",
+    "DROP TABLE IF EXISTS tasks_fts",
+)
+
+# Копия SEARCH_DDL из app.models.tasks на момент этой ревизии
+UPGRADE = {
+    'sqlite': DROP_SQLITE_INDEX + (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, user_id, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); "
+        "INSERT INTO tasks_fts(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); END",
+        # Индексация уже существующих задач
+        "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+    ),
+    'postgresql': (
+        # Расширение нужно для B-tree-колонки user_id в GIN-индексе; создать его может только
+        # владелец базы или суперпользователь
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_search_vector ON tasks USING gin (user_id, search_vector)",
+        "DROP INDEX IF EXISTS ix_tasks_search_vector",
+    ),
+}
+# Расширение btree_gin при откате остается: его могут использовать и другие индексы
+DOWNGRADE = {
+    'sqlite': DROP_SQLITE_INDEX + (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+    ),
+    'postgresql': (
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+        "DROP INDEX IF EXISTS ix_tasks_user_id_search_vector",
+    ),
+}
+
+
+def upgrade() -> None:
+    for statement in UPGRADE.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
@@ -0,0 +1,87 @@
+"""Add per-user task counters maintained by triggers
+
+Revision ID: a4c81f37d2e9
+Revises: f18c6e0b93a5
+Create Date: 2026-10-18 21:05:42.118307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c81f37d2e9'
+down_revision: Union[str, None] = 'f18c6e0b93a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия STATS_DDL из app.models.stats на момент этой ревизии
+TRIGGERS = {
+    'sqlite': (
+        "CREATE TRIGGER IF NOT EXISTS task_stats_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (new.user_id, new.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS task_stats_delete AFTER DELETE ON tasks BEGIN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = old.user_id AND status = old.status; END",
+        "CREATE TRIGGER IF NOT EXISTS task_stats_update AFTER UPDATE OF status, user_id ON tasks "
+        "WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = old.user_id AND status = old.status; "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (new.user_id, new.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1; END",
+    ),
+    'postgresql': (
+        "CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger AS $$ BEGIN "
+        "IF TG_OP IN ('UPDATE', 'DELETE') THEN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = OLD.user_id AND status = OLD.status; "
+        "END IF; "
+        "IF TG_OP IN ('INSERT', 'UPDATE') THEN "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (NEW.user_id, NEW.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = task_stats.count + 1; "
+        "END IF; "
+        "RETURN NULL; END $$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS task_stats_change ON tasks",
+        "CREATE TRIGGER task_stats_change AFTER INSERT OR DELETE OR UPDATE OF status, user_id ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION task_stats_apply()",
+    ),
+}
+DROP_TRIGGERS = {
+    'sqlite': (
+        "DROP TRIGGER IF EXISTS task_stats_insert",
+        "DROP TRIGGER IF EXISTS task_stats_delete",
+        "DROP TRIGGER IF EXISTS task_stats_update",
+    ),
+    'postgresql': (
+        "DROP TRIGGER IF EXISTS task_stats_change ON tasks",
+        "DROP FUNCTION IF EXISTS task_stats_apply()",
+    ),
+}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.create_table(
+        'task_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['status'], ['task_statuses.id']),
+        sa.PrimaryKeyConstraint('user_id', 'status'),
+    )
+    if dialect == 'postgresql':
+        # Задачи не меняются между заполнением счетчиков и созданием триггеров
+        op.execute("LOCK TABLE tasks IN SHARE MODE")
+    op.execute(
+        "INSERT INTO task_stats (user_id, status, count) "
+        "SELECT user_id, status, count(*) FROM tasks GROUP BY user_id, status"
+    )
+    for statement in TRIGGERS.get(dialect, ()):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DROP_TRIGGERS.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
+    op.drop_table('task_stats')
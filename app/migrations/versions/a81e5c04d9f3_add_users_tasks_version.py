@@ -0,0 +1,27 @@
+"""Add tasks_version to users
+
+Revision ID: a81e5c04d9f3
+Revises: 3f1c9a7d2b40
+Create Date: 2026-10-18 13:05:27.614920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81e5c04d9f3'
+down_revision: Union[str, None] = '3f1c9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('tasks_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('tasks_version')
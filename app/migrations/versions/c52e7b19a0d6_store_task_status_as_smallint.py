@@ -0,0 +1,75 @@
+"""Store task status as a small integer code
+
+Revision ID: c52e7b19a0d6
+Revises: a81e5c04d9f3
+Create Date: 2026-10-18 15:41:09.228361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52e7b19a0d6'
+down_revision: Union[str, None] = 'a81e5c04d9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Коды фиксированы: они хранятся в данных и не должны зависеть от кода приложения
+STATUS_CODES = {'Новая': 1, 'В процессе': 2, 'Завершена': 3}
+
+
+def convert_column(source: str, target: str, mapping: dict) -> None:
+    """
+    Заполняет колонку `target` значениями `source`, преобразованными по `mapping`.
+
+    Миграция выполняется в одной транзакции (см. env.py), а batch_alter_table
+    ниже все равно копирует всю таблицу, поэтому разбиение на пакеты ничего
+    не дает и строки переносятся одним UPDATE.
+    """
+    bind = op.get_bind()
+    tasks = sa.table('tasks', sa.column(source), sa.column(target))
+    value = sa.case(*((tasks.c[source] == old, new) for old, new in mapping.items()), else_=None)
+    bind.execute(tasks.update().values({target: value}))
+    unknown = bind.execute(sa.select(sa.func.count()).where(tasks.c[target].is_(None))).scalar()
+    if unknown:
+        raise RuntimeError(f"Задачи с неизвестным статусом: {unknown}")
+
+
+def upgrade() -> None:
+    statuses = op.create_table(
+        'task_statuses',
+        sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column('label', sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('label'),
+    )
+    op.bulk_insert(statuses, [{'id': code, 'label': label} for label, code in STATUS_CODES.items()])
+
+    op.add_column('tasks', sa.Column('status_code', sa.SmallInteger(), nullable=True))
+    convert_column('status', 'status_code', STATUS_CODES)
+
+    op.drop_index('ix_tasks_user_id_status', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_code', new_column_name='status', existing_type=sa.SmallInteger(),
+                              nullable=False)
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.create_foreign_key('fk_tasks_status_task_statuses', 'task_statuses', ['status'], ['id'])
+    op.create_index('ix_tasks_user_id_status', 'tasks', ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.add_column('tasks', sa.Column('status_label', sa.String(), nullable=True))
+    convert_column('status', 'status_label', {code: label for label, code in STATUS_CODES.items()})
+
+    op.drop_index('ix_tasks_user_id_status', table_name='tasks')
+    # Внешний ключ на task_statuses удаляется вместе с колонкой
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_label', new_column_name='status', existing_type=sa.String(),
+                              nullable=False)
+    op.create_index('ix_tasks_user_id_status', 'tasks', ['user_id', 'status'], unique=False)
+    op.drop_table('task_statuses')
@@ -0,0 +1,41 @@
+"""Enforce task title uniqueness with a unique index
+
+Revision ID: e3b9d5a7c214
+Revises: d7a40f2c61b8
+Create Date: 2026-10-18 18:36:02.471590
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9d5a7c214'
+down_revision: Union[str, None] = 'd7a40f2c61b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Та же настройка, что и в app.models.tasks
+UNIQUE_COLUMNS = ['title'] if os.getenv('TASK_TITLE_UNIQUE_SCOPE', 'global') == 'global' else ['user_id', 'title']
+
+
+def upgrade() -> None:
+    tasks = sa.table('tasks', *(sa.column(name) for name in UNIQUE_COLUMNS))
+    duplicates = op.get_bind().execute(
+        sa.select(sa.func.count()).select_from(
+            sa.select(*tasks.c).group_by(*tasks.c).having(sa.func.count() > 1).subquery()
+        )
+    ).scalar()
+    if duplicates:
+        raise RuntimeError(f"Есть повторяющиеся заголовки задач (групп: {duplicates}), уникальный индекс создать нельзя")
+
+    op.drop_index('ix_tasks_title', table_name='tasks')
+    op.create_index('uq_tasks_title', 'tasks', UNIQUE_COLUMNS, unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_tasks_title', table_name='tasks')
+    op.create_index('ix_tasks_title', 'tasks', ['title'], unique=False)
@@ -0,0 +1,63 @@
+"""Add full-text search index for tasks
+
+Revision ID: f18c6e0b93a5
+Revises: e3b9d5a7c214
+Create Date: 2026-10-18 19:48:15.730264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f18c6e0b93a5'
+down_revision: Union[str, None] = 'e3b9d5a7c214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия SEARCH_DDL из app.models.tasks на момент этой ревизии
+UPGRADE = {
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        # Индексация уже существующих задач
+        "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+    ),
+    'postgresql': (
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+    ),
+}
+DOWNGRADE = {
+    'sqlite': (
+        "DROP TRIGGER IF EXISTS tasks_fts_insert",
+        "DROP TRIGGER IF EXISTS tasks_fts_delete",
+        "DROP TRIGGER IF EXISTS tasks_fts_update",
+        "DROP TABLE IF EXISTS tasks_fts",
+    ),
+    'postgresql': (
+        "DROP INDEX IF EXISTS ix_tasks_search_vector",
+        "ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector",
+    ),
+}
+
+
+def upgrade() -> None:
+    for statement in UPGRADE.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
@@ -7,6 +7,9 @@
 
 Импортируемые классы:
 - Task: Модель задачи, представляющая задачи в приложении.
+- TaskStatus: Справочник статусов задач.
+- TaskStats: Счетчики задач пользователя по статусам.
+- RefreshToken: Токен обновления, хранящийся в виде хеша.
 - User: Модель пользователя, представляющая пользователей системы.
 
 Основные функции:
@@ -14,5 +17,7 @@
 - Регистрация моделей и их миграций.
 - Определение функций для работы с данными и выполнения CRUD-операций.
 """
-from .tasks import Task
+from .tasks import TASK_STATUSES, Task, TaskStatus
+from .stats import TaskStats
+from .tokens import RefreshToken
 from .users import User
@@ -0,0 +1,85 @@
+from app.database.db import Base
+from sqlalchemy import Column, ForeignKey, Integer, event
+
+from .tasks import Task, TaskStatusType
+
+
+class TaskStats(Base):
+    """
+    Счетчики задач пользователя по статусам.
+
+    Строки поддерживают триггеры базы данных на таблице `tasks` в той же
+    транзакции, что и изменение задачи, поэтому счетчики учитывают и
+    пакетные команды INSERT/UPDATE/DELETE. Восстановить счетчики по данным
+    и проверить их можно командой `python -m app.task_stats`.
+
+    Атрибуты:
+        user_id (int): Идентификатор пользователя.
+        status (str): Статус задачи (в базе хранится код из `task_statuses`).
+        count (int): Число задач пользователя с этим статусом.
+    """
+    __tablename__ = 'task_stats'
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    status = Column(TaskStatusType, ForeignKey('task_statuses.id'), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default='0')
+
+
+# Триггеры ссылаются на таблицу tasks, поэтому task_stats создается после нее
+TaskStats.__table__.add_is_dependent_on(Task.__table__)
+
+# Триггеры, поддерживающие task_stats. Как и триггеры FTS5, они удаляются при
+# пересоздании таблицы tasks batch-миграцией Alembic.
+STATS_DDL = {
+    'sqlite': (
+        "CREATE TRIGGER IF NOT EXISTS task_stats_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (new.user_id, new.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS task_stats_delete AFTER DELETE ON tasks BEGIN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = old.user_id AND status = old.status; END",
+        "CREATE TRIGGER IF NOT EXISTS task_stats_update AFTER UPDATE OF status, user_id ON tasks "
+        "WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = old.user_id AND status = old.status; "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (new.user_id, new.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1; END",
+    ),
+    'postgresql': (
+        "CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger AS $$ BEGIN "
+        "IF TG_OP IN ('UPDATE', 'DELETE') THEN "
+        "UPDATE task_stats SET count = count - 1 WHERE user_id = OLD.user_id AND status = OLD.status; "
+        "END IF; "
+        "IF TG_OP IN ('INSERT', 'UPDATE') THEN "
+        "INSERT INTO task_stats (user_id, status, count) VALUES (NEW.user_id, NEW.status, 1) "
+        "ON CONFLICT (user_id, status) DO UPDATE SET count = task_stats.count + 1; "
+        "END IF; "
+        "RETURN NULL; END $$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS task_stats_change ON tasks",
+        "CREATE TRIGGER task_stats_change AFTER INSERT OR DELETE OR UPDATE OF status, user_id ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION task_stats_apply()",
+    ),
+}
+STATS_DROP_DDL = {
+    'sqlite': (
+        "DROP TRIGGER IF EXISTS task_stats_insert",
+        "DROP TRIGGER IF EXISTS task_stats_delete",
+        "DROP TRIGGER IF EXISTS task_stats_update",
+    ),
+    'postgresql': (
+        "DROP TRIGGER IF EXISTS task_stats_change ON tasks",
+        "DROP FUNCTION IF EXISTS task_stats_apply()",
+    ),
+}
+
+
+@event.listens_for(TaskStats.__table__, 'after_create')
+def create_stats_triggers(target, connection, **kw):
+    """Создает триггеры, поддерживающие счетчики, для диалекта соединения."""
+    for statement in STATS_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(TaskStats.__table__, 'before_drop')
+def drop_stats_triggers(target, connection, **kw):
+    """Удаляет триггеры вместе с таблицей счетчиков."""
+    for statement in STATS_DROP_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
@@ -1,6 +1,64 @@
+import os
+
 from app.database.db import Base
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, SmallInteger, String, event
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
+
+# Допустимые статусы задачи и их коды в базе данных
+TASK_STATUS_CODES = {"Новая": 1, "В процессе": 2, "Завершена": 3}
+TASK_STATUS_LABELS = {code: label for label, code in TASK_STATUS_CODES.items()}
+TASK_STATUSES = tuple(TASK_STATUS_CODES)
+
+# Область уникальности заголовка задачи: 'global' - среди всех задач,
+# 'user' - среди задач одного пользователя. Смена области требует пересоздания
+# индекса uq_tasks_title (миграция читает ту же настройку).
+TASK_TITLE_UNIQUE_SCOPE = os.getenv('TASK_TITLE_UNIQUE_SCOPE', 'global')
+if TASK_TITLE_UNIQUE_SCOPE not in ('global', 'user'):
+    raise ValueError(f"Неизвестная область уникальности заголовка: {TASK_TITLE_UNIQUE_SCOPE}")
+TASK_TITLE_UNIQUE_COLUMNS = ('title',) if TASK_TITLE_UNIQUE_SCOPE == 'global' else ('user_id', 'title')
+
+
+class TaskStatusType(TypeDecorator):
+    """
+    Статус задачи: в приложении - строковая метка, в базе - код SmallInteger.
+
+    Неизвестная метка превращается в NULL: в фильтрах такое условие ничего
+    не находит, а при записи срабатывает ограничение NOT NULL.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return TASK_STATUS_CODES.get(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return TASK_STATUS_LABELS[value]
+
+
+class TaskStatus(Base):
+    """
+    Справочник статусов задач.
+
+    Атрибуты:
+        id (int): Код статуса, хранящийся в `tasks.status`.
+        label (str): Название статуса, которое видит клиент API.
+    """
+    __tablename__ = 'task_statuses'
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    label = Column(String(20), nullable=False, unique=True)
+
+
+@event.listens_for(TaskStatus.__table__, 'after_create')
+def fill_task_statuses(target, connection, **kw):
+    """Заполняет справочник статусов сразу после создания таблицы."""
+    connection.execute(target.insert(), [{'id': code, 'label': label} for label, code in TASK_STATUS_CODES.items()])
+
 
 class Task(Base):
     """
@@ -10,21 +68,81 @@ class Task(Base):
         id (int): Уникальный идентификатор задачи.
         title (str): Название задачи.
         description (str): Описание задачи (может быть пустым).
-        status (str): Статус задачи.
+        status (str): Статус задачи (в базе хранится код из `task_statuses`).
         user_id (int): Идентификатор пользователя, которому принадлежит задача.
 
     Связи:
         user (User): Отношение, связывающее задачу с пользователем.
     """
     __tablename__ = 'tasks'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Страницы задач пользователя: WHERE user_id = ? AND id > ? ORDER BY id
+        Index('ix_tasks_user_id_id', 'user_id', 'id'),
+        # Фильтр по статусу внутри задач пользователя
+        Index('ix_tasks_user_id_status', 'user_id', 'status'),
+        # Уникальность заголовка обеспечивает база данных
+        Index('uq_tasks_title', *TASK_TITLE_UNIQUE_COLUMNS, unique=True),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(50), nullable=False)
     description = Column(String(200), nullable=True)
-    status = Column(String, nullable=False)
+    status = Column(TaskStatusType, ForeignKey('task_statuses.id', name='fk_tasks_status_task_statuses'), nullable=False)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     # Связь с пользователем
     user = relationship('User', back_populates='tasks')
 
 
+# Полнотекстовый индекс по title и description, разделенный по владельцу задачи:
+# поиск сначала сужается до задач пользователя и только их оценивает. В SQLite
+# это внешняя таблица FTS5 с проиндексированной колонкой user_id, синхронизируемая
+# триггерами (пересоздание таблицы tasks, например batch-миграцией Alembic,
+# удаляет триггеры - их нужно создать заново). В PostgreSQL - вычисляемая колонка
+# tsvector и составной GIN-индекс (user_id, search_vector) из расширения btree_gin.
+SEARCH_DDL = {
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, user_id, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, user_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.user_id); "
+        "INSERT INTO tasks_fts(rowid, title, description, user_id) "
+        "VALUES (new.id, new.title, new.description, new.user_id); END",
+    ),
+    'postgresql': (
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_search_vector ON tasks USING gin (user_id, search_vector)",
+    ),
+}
+SEARCH_DROP_DDL = {
+    'sqlite': (
+        "DROP TRIGGER IF EXISTS tasks_fts_insert",
+        "DROP TRIGGER IF EXISTS tasks_fts_delete",
+        "DROP TRIGGER IF EXISTS tasks_fts_update",
+        "DROP TABLE IF EXISTS tasks_fts",
+    ),
+}
+
+
+@event.listens_for(Task.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    """Создает полнотекстовый индекс задач для диалекта соединения."""
+    for statement in SEARCH_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Task.__table__, 'before_drop')
+def drop_search_index(target, connection, **kw):
+    """Удаляет индекс FTS5 вместе с таблицей задач, чтобы он не пережил ее содержимое."""
+    for statement in SEARCH_DROP_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,29 @@
+from app.database.db import Base
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+
+
+class RefreshToken(Base):
+    """
+    Модель токена обновления.
+
+    Сам токен клиенту выдается один раз, в базе хранится только его SHA-256:
+    токен случайный и длинный, поэтому медленный хеш вроде bcrypt не нужен.
+    Токены одной цепочки ротаций объединены общим `family`; повторное
+    использование уже замененного токена отзывает всю цепочку.
+
+    Атрибуты:
+        id (int): Уникальный идентификатор записи.
+        user_id (int): Идентификатор владельца токена.
+        token_hash (str): SHA-256 токена в шестнадцатеричном виде.
+        family (str): Идентификатор цепочки ротаций.
+        expires_at (datetime): Момент истечения токена (UTC).
+        revoked (bool): Токен заменен или отозван.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family = Column(String(32), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, nullable=False, default=False, server_default='0')
@@ -12,6 +12,7 @@ class User(Base):
         name (str): Имя пользователя.
         email (str): Электронная почта пользователя, должна быть уникальной.
         password (str): Пароль пользователя (возможно, должен храниться в хэшированном виде).
+        tasks_version (int): Версия набора задач пользователя, растет при каждом изменении задач.
 
     Связи:
         tasks (list[Task]): Список задач, связанных с пользователем.
@@ -19,9 +20,10 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(50), nullable=False)
+    name = Column(String(50), nullable=False, index=True)
     email = Column(String(120), nullable=False, unique=True)
     password = Column(String(128), nullable=False)
+    tasks_version = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Связь с задачами
     tasks = relationship('Task', back_populates='user')
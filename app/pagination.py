@@ -0,0 +1,171 @@
+"""
+Модуль курсорной (keyset) пагинации.
+
+Вместо OFFSET запросы "перескакивают" на нужную позицию по первичному ключу
+(`WHERE id > :last_id ORDER BY id LIMIT :n`), поэтому стоимость выборки
+не зависит от номера страницы. Курсор передается клиенту в непрозрачном виде
+(base64 от JSON) в заголовке `X-Next-Cursor`.
+"""
+
+import base64
+import json
+from typing import Any, Callable, Literal, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+SortOrder = Literal['asc', 'desc']
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(payload, dict) or not isinstance(payload.get('id'), int):
+        raise ValueError
+    return payload
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Кодирует идентификатор последней записи страницы в непрозрачный курсор.
+
+    Аргументы:
+        last_id (int): Идентификатор последней выданной записи.
+
+    Возвращает:
+        str: Курсор в формате base64url без выравнивания.
+    """
+    return _encode({'id': last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Декодирует курсор, полученный от клиента.
+
+    Аргументы:
+        cursor (str): Курсор из параметра запроса.
+
+    Возвращает:
+        int: Идентификатор записи, после которой начинается страница.
+
+    Исключения:
+        HTTPException: Если курсор поврежден или подделан.
+    """
+    try:
+        return _decode(cursor)['id']
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор")
+
+
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    """
+    Кодирует курсор для выдачи, упорядоченной по релевантности.
+
+    Аргументы:
+        rank (float): Оценка релевантности последней выданной записи.
+        last_id (int): Идентификатор последней выданной записи.
+
+    Возвращает:
+        str: Курсор в формате base64url без выравнивания.
+    """
+    return _encode({'rank': rank, 'id': last_id})
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Декодирует курсор выдачи, упорядоченной по релевантности.
+
+    Аргументы:
+        cursor (str): Курсор из параметра запроса.
+
+    Возвращает:
+        Tuple[float, int]: Оценка и идентификатор записи, после которой начинается страница.
+
+    Исключения:
+        HTTPException: Если курсор поврежден или подделан.
+    """
+    try:
+        payload = _decode(cursor)
+        if not isinstance(payload['rank'], (int, float)):
+            raise ValueError
+        return float(payload['rank']), payload['id']
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор")
+
+
+def paginate(query: Select, id_column, cursor: Optional[str], limit: int, order: SortOrder) -> Select:
+    """
+    Добавляет к запросу условие поиска по ключу, сортировку и ограничение.
+
+    Запрашивается на одну запись больше `limit`, чтобы без отдельного COUNT
+    узнать, существует ли следующая страница.
+
+    Аргументы:
+        query (Select): Исходный запрос.
+        id_column: Колонка первичного ключа, по которой идет поиск.
+        cursor (Optional[str]): Курсор предыдущей страницы.
+        limit (int): Размер страницы.
+        order (SortOrder): Порядок сортировки ('asc' или 'desc').
+
+    Возвращает:
+        Select: Запрос для одной страницы.
+    """
+    if cursor is not None:
+        last_id = decode_cursor(cursor)
+        query = query.where(id_column > last_id if order == 'asc' else id_column < last_id)
+    order_by = id_column.asc() if order == 'asc' else id_column.desc()
+    return query.order_by(order_by).limit(limit + 1)
+
+
+def cut_page(rows: Sequence[Any], limit: int,
+             get_id: Callable[[Any], int] = lambda row: row.id) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Отрезает служебную запись и вычисляет курсор следующей страницы.
+
+    Аргументы:
+        rows (Sequence[Any]): Результат запроса, построенного `paginate`.
+        limit (int): Размер страницы.
+        get_id (Callable): Функция получения идентификатора из записи.
+
+    Возвращает:
+        Tuple[Sequence[Any], Optional[str]]: Записи страницы и курсор следующей
+        страницы (None, если страница последняя).
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(get_id(rows[-1]))
+    return rows, None
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Записывает курсор следующей страницы в заголовок ответа."""
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def split_page(rows: Sequence[Any], limit: int, response: Response,
+               get_id: Callable[[Any], int] = lambda row: row.id) -> Sequence[Any]:
+    """
+    Отрезает служебную запись и выставляет заголовок со следующим курсором.
+
+    Аргументы:
+        rows (Sequence[Any]): Результат запроса, построенного `paginate`.
+        limit (int): Размер страницы.
+        response (Response): Ответ, в который записывается заголовок.
+        get_id (Callable): Функция получения идентификатора из записи.
+
+    Возвращает:
+        Sequence[Any]: Записи текущей страницы.
+    """
+    rows, next_cursor = cut_page(rows, limit, get_id)
+    set_next_cursor(response, next_cursor)
+    return rows
@@ -0,0 +1,207 @@
+"""
+Модуль профилирования запросов и журнала медленных SQL-запросов.
+
+Профилирование включается явно: заголовком `X-Profile: 1` (если разрешено
+настройкой) или случайной выборкой доли запросов. Профиль cProfile
+сохраняется в каталог PROFILE_DIR, а имя файла возвращается клиенту
+в заголовке `X-Profile-Id`. Файл открывается через `python -m pstats`
+или snakeviz. cProfile видит весь поток, поэтому в профиль попадают и
+сопрограммы других запросов, выполнявшихся в это время; одновременно
+профилируется не более одного запроса. Файл профиля записывается в
+отдельном потоке, чтобы не останавливать цикл событий.
+
+Медленные SQL-запросы (дольше SLOW_QUERY_MS) записываются в журнал вместе
+с числом параметров, длительностью и маршрутом, из которого они выполнены.
+Маршрут запоминает `SlowQueryRouteMiddleware`, поэтому он известен и при
+выключенных метриках (METRICS_ENABLED=0).
+Значения параметров не сохраняются: среди них адреса почты, хеши паролей
+и дайджесты refresh-токенов. Последние записи доступны через
+`recent_slow_queries()`, а по HTTP - только при SLOW_QUERY_ENDPOINT_ENABLED=1.
+
+Настройки (переменные окружения):
+- PROFILE_HEADER_ENABLED: разрешает профилирование по заголовку (по умолчанию 0).
+- PROFILE_SAMPLE_RATE: доля профилируемых запросов от 0 до 1 (по умолчанию 0).
+- PROFILE_DIR: каталог профилей (по умолчанию `<tmp>/task-api-profiles`).
+- PROFILE_KEEP: сколько последних профилей хранить (по умолчанию 100, 0 - не удалять старые).
+- SLOW_QUERY_MS: порог медленного запроса в миллисекундах (по умолчанию 200, 0 отключает).
+- SLOW_QUERY_LOG_SIZE: сколько последних медленных запросов держать в памяти (по умолчанию 100).
+- SLOW_QUERY_ENDPOINT_ENABLED: открывает `GET /health/slow-queries` (по умолчанию 0).
+"""
+
+import asyncio
+import cProfile
+import os
+import random
+import tempfile
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import loguru
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics import route_template
+
+load_dotenv()
+
+PROFILE_HEADER = b'x-profile'
+PROFILE_ID_HEADER = b'x-profile-id'
+PROFILE_HEADER_ENABLED = os.getenv('PROFILE_HEADER_ENABLED', '0').lower() in ('1', 'true', 'yes', 'on')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'task-api-profiles'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '100'))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '100'))
+SLOW_QUERY_ENDPOINT_ENABLED = os.getenv('SLOW_QUERY_ENDPOINT_ENABLED', '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware, снимающее профиль cProfile с выбранных запросов.
+
+    Аргументы:
+        app: Следующее ASGI-приложение.
+        header_enabled (bool): Профилировать запросы с заголовком `X-Profile`.
+        sample_rate (float): Доля случайно выбранных запросов для профилирования.
+        directory (str): Каталог для сохранения профилей.
+        keep (int): Число хранимых профилей; более старые удаляются. 0 - хранить все.
+    """
+
+    def __init__(self, app, header_enabled: bool = PROFILE_HEADER_ENABLED,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, directory: str = PROFILE_DIR,
+                 keep: int = PROFILE_KEEP):
+        self.app = app
+        self.header_enabled = header_enabled
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.keep = keep
+        self._active = False
+
+    def wants_profile(self, scope: dict) -> bool:
+        """Решает, нужно ли профилировать запрос."""
+        if self.header_enabled:
+            for name, value in scope['headers']:
+                if name == PROFILE_HEADER:
+                    return value not in (b'', b'0', b'false')
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self._active or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}.prof'
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._active = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self._active = False
+            await asyncio.to_thread(self.save, profiler, profile_id, scope)
+
+    def save(self, profiler: cProfile.Profile, profile_id: str, scope: dict) -> None:
+        """
+        Сохраняет профиль и удаляет профили сверх лимита `keep`.
+
+        Выполняет файловый ввод-вывод синхронно, поэтому вызывается в отдельном потоке.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(path)
+        loguru.logger.info(f"Профиль {scope['method']} {scope['path']} сохранен в {path}")
+        if self.keep <= 0:
+            return
+        profiles = sorted((entry.stat().st_mtime_ns, entry.path)
+                          for entry in os.scandir(self.directory) if entry.name.endswith('.prof'))
+        for _, old in profiles[:-self.keep]:
+            os.remove(old)
+
+
+request_scope: ContextVar[Optional[dict]] = ContextVar('slow_query_request_scope', default=None)
+
+
+class SlowQueryRouteMiddleware:
+    """
+    ASGI-middleware, запоминающее scope текущего запроса для журнала медленных запросов.
+
+    Маршрутизатор дописывает найденный маршрут в тот же scope, поэтому к
+    моменту выполнения SQL-запросов из него можно получить шаблон пути.
+
+    Аргументы:
+        app: Следующее ASGI-приложение.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
+
+
+slow_queries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _parameter_count(parameters, executemany: bool) -> int:
+    """Считает параметры запроса, не заглядывая в их значения."""
+    if not parameters:
+        return 0
+    if executemany:
+        return sum(len(row) for row in parameters)
+    return len(parameters)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._slow_query_started) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+    scope = request_scope.get()
+    entry = {
+        'statement': statement,
+        'parameter_count': _parameter_count(parameters, executemany),
+        'duration_ms': round(duration_ms, 3),
+        'route': f"{scope['method']} {route_template(scope)}" if scope is not None else None,
+    }
+    slow_queries.append(entry)
+    loguru.logger.warning(
+        f"Медленный запрос ({entry['duration_ms']} мс, {entry['route']}, "
+        f"параметров: {entry['parameter_count']}): {statement}"
+    )
+
+
+def recent_slow_queries() -> List[Dict[str, Any]]:
+    """Возвращает последние медленные SQL-запросы, начиная с самых новых."""
+    return list(reversed(slow_queries))
+
+
+def instrument_slow_queries() -> None:
+    """Подписывает журнал медленных запросов на события всех движков SQLAlchemy."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+if SLOW_QUERY_MS > 0:
+    instrument_slow_queries()
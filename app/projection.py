@@ -0,0 +1,42 @@
+"""
+Модуль проекций: выборка только тех колонок, которые нужны схеме ответа.
+
+Вместо `select(User)` с загрузкой всех колонок (включая хеш пароля),
+созданием ORM-объектов и учетом их в identity map обработчики чтения
+выбирают колонки, перечисленные в Pydantic-схеме, и получают легкие
+строки-кортежи. Набор колонок объявляется один раз рядом с обработчиками:
+
+    READ_USER_COLUMNS = schema_columns(ReadUser, User)
+"""
+
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Row, inspect
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def schema_columns(schema: Type[BaseModel], model: Any) -> Tuple[InstrumentedAttribute, ...]:
+    """
+    Возвращает колонки модели для полей схемы в порядке их объявления.
+
+    Аргументы:
+        schema (Type[BaseModel]): Схема ответа.
+        model: ORM-модель, из таблицы которой читаются поля.
+
+    Возвращает:
+        Tuple[InstrumentedAttribute, ...]: Колонки для `select(*columns)`.
+
+    Исключения:
+        ValueError: Если у модели нет колонки для какого-либо поля схемы.
+    """
+    column_names = inspect(model).column_attrs.keys()
+    missing = [name for name in schema.model_fields if name not in column_names]
+    if missing:
+        raise ValueError(f"У модели {model.__name__} нет колонок для полей {schema.__name__}: {', '.join(missing)}")
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def row_as_dict(row: Optional[Row]) -> Optional[Dict[str, Any]]:
+    """Превращает строку проекции в словарь (None остается None)."""
+    return row._asdict() if row is not None else None
@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+import hashlib
+import os
+import secrets
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
+from app.models.tokens import RefreshToken
 from app.models.users import User
 from app.database.db_session import get_db
-from typing import Annotated
-from datetime import datetime, timedelta
+from app.schemas import RefreshTokenRequest, TokenPair
+from typing import Annotated, Optional
+from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.utils import SECRET_KEY, ALGORITHM, bcrypt_context, oauth2_scheme
+from app.utils import SECRET_KEY, ALGORITHM, oauth2_scheme
+from app.hashing import verify_password
+from app.throttle import login_throttle
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '15'))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', '30'))
+
 
 async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], username: str, password: str) -> User:
     """
@@ -29,7 +39,7 @@ async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], userna
         User: Объект аутентифицированного пользователя.
     """
     user = await db.scalar(select(User).where(User.name == username))
-    if not user or not bcrypt_context.verify(password, user.password):
+    if not user or not await verify_password(password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Некорректные учетные данные",
@@ -103,6 +113,70 @@ async def create_access_token(name: str, user_id: int, expires_delta: timedelta)
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def hash_refresh_token(token: str) -> str:
+    """
+    Вычисляет SHA-256 токена обновления для хранения и поиска в базе.
+
+    Аргументы:
+        token (str): Токен обновления в открытом виде.
+
+    Возвращает:
+        str: Хеш токена в шестнадцатеричном виде.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def utcnow() -> datetime:
+    """Текущее время UTC без часового пояса (в таком виде хранится `expires_at`)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def issue_token_pair(db: AsyncSession, user_id: int, name: str, family: Optional[str] = None) -> TokenPair:
+    """
+    Выпускает токен доступа и новый токен обновления.
+
+    Запись токена обновления добавляется в сессию; коммит выполняет
+    вызывающий код.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): Идентификатор пользователя.
+        name (str): Имя пользователя.
+        family (Optional[str]): Цепочка ротаций; None начинает новую цепочку.
+
+    Возвращает:
+        TokenPair: Токен доступа и токен обновления.
+    """
+    refresh_token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(refresh_token),
+        family=family or secrets.token_hex(16),
+        expires_at=utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    access_token = await create_access_token(name, user_id, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    return TokenPair(access_token=access_token, refresh_token=refresh_token,
+                     expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+async def revoke_family(db: AsyncSession, family: str) -> None:
+    """Отзывает все токены обновления цепочки `family`."""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family == family)
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный токен обновления",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 @router.get('/read_current_user')
 async def read_current_user(user: dict = Depends(get_current_user)):
     """
@@ -117,22 +191,29 @@ async def read_current_user(user: dict = Depends(get_current_user)):
     return {'User': user}
 
 
-@router.post('/token')
-async def login(db: Annotated[AsyncSession, Depends(get_db)],
+@router.post('/token', response_model=TokenPair)
+async def login(request: Request,
+                db: Annotated[AsyncSession, Depends(get_db)],
                 form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     """
     Endpoint для получения токена доступа.
 
+    Перед проверкой пароля попытка проходит через ограничитель `login_throttle`.
+
     Аргументы:
+        request (Request): Запрос (для IP-адреса клиента).
         db (AsyncSession): Сессия базы данных.
         form_data (OAuth2PasswordRequestForm): Форма с учетными данными пользователя.
 
     Исключения:
-        HTTPException: Если не удалось аутентифицировать пользователя.
+        HTTPException: Если попыток входа слишком много (429) или не удалось
+        аутентифицировать пользователя.
 
     Возвращает:
-        dict: Словарь с токеном доступа и типом токена.
+        TokenPair: Токен доступа, токен обновления и тип токена.
     """
+    # Отказ до обращения к базе и bcrypt: сессия еще не взяла соединение из пула
+    await login_throttle.check(form_data.username, request.client.host if request.client else None)
     user = await authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
@@ -141,10 +222,99 @@ async def login(db: Annotated[AsyncSession, Depends(get_db)],
             detail='Не удалось аутентифицировать пользователя'
         )
 
-    token = await create_access_token(user.name,
-                                      user.id,
-                                      expires_delta=timedelta(minutes=15))
-    return {
-        'access_token': token,
-        'token_type': 'bearer'
-    }
+    # Истекшие токены пользователя больше не нужны даже для обнаружения повторов
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id, RefreshToken.expires_at <= utcnow()))
+    pair = await issue_token_pair(db, user.id, user.name)
+    await db.commit()
+    return pair
+
+
+@router.post('/refresh', response_model=TokenPair)
+async def refresh(body: RefreshTokenRequest, db: Annotated[AsyncSession, Depends(get_db)]):
+    """
+    Endpoint для обновления токена доступа без проверки пароля.
+
+    Предъявленный токен обновления заменяется новым (ротация). Повторное
+    предъявление уже замененного токена означает, что цепочка могла быть
+    украдена, поэтому вся цепочка отзывается.
+
+    Аргументы:
+        body (RefreshTokenRequest): Токен обновления.
+        db (AsyncSession): Сессия базы данных.
+
+    Исключения:
+        HTTPException: Если токен неизвестен, истек, отозван или уже использован.
+
+    Возвращает:
+        TokenPair: Новый токен доступа и новый токен обновления.
+    """
+    row = (await db.execute(
+        select(RefreshToken.id, RefreshToken.user_id, RefreshToken.family,
+               RefreshToken.expires_at, RefreshToken.revoked, User.name)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+    )).one_or_none()
+    if row is None or row.expires_at <= utcnow():
+        raise invalid_refresh_token()
+
+    # Условное обновление атомарно: из двух одновременных ротаций одного токена пройдет одна
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.revoked.is_(False))
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    if row.revoked or rotated.rowcount != 1:
+        await revoke_family(db, row.family)
+        await db.commit()
+        raise invalid_refresh_token()
+
+    pair = await issue_token_pair(db, row.user_id, row.name, row.family)
+    await db.commit()
+    return pair
+
+
+@router.post('/revoke')
+async def revoke(body: RefreshTokenRequest, db: Annotated[AsyncSession, Depends(get_db)]):
+    """
+    Endpoint для отзыва токена обновления (выход из сеанса).
+
+    Отзывается вся цепочка ротаций токена. Неизвестный токен не считается
+    ошибкой, чтобы ответ не раскрывал, существует ли токен.
+
+    Аргументы:
+        body (RefreshTokenRequest): Токен обновления.
+        db (AsyncSession): Сессия базы данных.
+
+    Возвращает:
+        dict: Сообщение об отзыве.
+    """
+    family = await db.scalar(
+        select(RefreshToken.family).where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+    )
+    if family is not None:
+        await revoke_family(db, family)
+        await db.commit()
+    return {"detail": "Токен отозван"}
+
+
+@router.post('/revoke_all')
+async def revoke_all(db: Annotated[AsyncSession, Depends(get_db)], user: dict = Depends(get_current_user)):
+    """
+    Endpoint для отзыва всех токенов обновления текущего пользователя.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Данные о текущем пользователе.
+
+    Возвращает:
+        dict: Сообщение об отзыве.
+    """
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user['id'])
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return {"detail": "Все токены отозваны"}
@@ -1,14 +1,43 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy import select
-from app.models import Task
-from app.schemas import CreateTask, ReadTask, UpdateTask
+from fastapi import APIRouter, Body, Depends, Header, status, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app.models import TASK_STATUSES, Task
+from app.models.tasks import TASK_TITLE_UNIQUE_SCOPE
+from app.schemas import BulkTaskResult, CreateTask, ReadTask, ReadTaskStats, UpdateTask, UpdateTaskStatus
 from app.database.db_session import get_db
-from typing import List
+from typing import Annotated, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils import get_current_user
+from app.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SortOrder, cut_page, encode_rank_cursor, paginate,
+                            set_next_cursor)
+from app.search import search_tasks_query, search_terms
+from app.task_stats import read_task_stats
+from app.export import MEDIA_TYPES, ExportFormat, stream_rows
+from app.etag import bump_tasks_version, check_not_modified, get_tasks_version
+from app.cache import read_cache
+from app.events import event_stream, task_events
+from app.fast_json import FAST_JSON_RESPONSES, fast_json_response, rows_as_dicts
+from app.projection import row_as_dict, schema_columns
 
 router = APIRouter(prefix='/task', tags=['Task'])
 
+MAX_BULK_SIZE = 1000
+# Колонки ReadTask для чтения строк без гидратации ORM-объектов
+READ_TASK_COLUMNS = schema_columns(ReadTask, Task)
+TITLE_TAKEN = "Задача с таким заголовком уже есть"
+
+
+def is_title_conflict(error: IntegrityError) -> bool:
+    """
+    Проверяет, что ошибка вызвана индексом уникальности заголовка `uq_tasks_title`.
+
+    PostgreSQL называет нарушенный индекс, SQLite - его колонки.
+    """
+    message = str(error.orig)
+    return 'uq_tasks_title' in message or 'tasks.title' in message
+
+
 @router.post('', response_model=CreateTask, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: CreateTask,
@@ -24,7 +53,7 @@ async def create_task(
         user (dict): Информация о текущем пользователе.
 
     Исключения:
-        HTTPException: Если статус задачи недопустим.
+        HTTPException: Если статус задачи недопустим или заголовок уже занят.
 
     Возвращает:
         CreateTask: Созданная задача.
@@ -32,29 +61,55 @@ async def create_task(
     user_id = user['id']
 
     # Проверка на допустимый статус задачи
-    if task.status not in ["Новая", "В процессе", "Завершена"]:
+    if task.status not in TASK_STATUSES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый статус задачи")
-    if (await db.execute(select(Task).where(Task.title == task.title))).scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Задача с таким заголовком уже есть")
 
+    # Уникальность заголовка проверяет индекс uq_tasks_title при вставке
     db_task = Task(**task.dict(), user_id=user_id)
     db.add(db_task)
     try:
+        await bump_tasks_version(db, user_id)
         await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_title_conflict(e):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=TITLE_TAKEN)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при добавлении задачи в базу данных")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при добавлении задачи в базу данных")
+    await read_cache.invalidate(f'tasks:{user_id}')
+    await task_events.publish(user_id, 'created', ReadTask.model_validate(db_task, from_attributes=True).model_dump())
     return db_task
 
 @router.get('', response_model=List[ReadTask])
 async def read_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: SortOrder = 'asc',
+    task_status: Optional[List[str]] = Query(None, alias='status'),
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """
-    Получение списка задач текущего пользователя.
+    Получение страницы задач текущего пользователя.
+
+    Используется курсорная пагинация по `id`: если есть следующая страница,
+    ее курсор возвращается в заголовке `X-Next-Cursor`. Ответ содержит ETag
+    версии задач пользователя; при совпадении с If-None-Match возвращается 304.
+    Страницы кэшируются в `read_cache` до следующего изменения задач.
+    Выбираются только колонки ReadTask, без создания ORM-объектов. При
+    FAST_JSON_RESPONSES страница кодируется orjson без валидации моделью ответа.
 
     Аргументы:
+        request (Request): Текущий запрос.
+        response (Response): Ответ для установки заголовков.
+        limit (int): Размер страницы.
+        cursor (Optional[str]): Курсор, полученный с предыдущей страницей.
+        order (SortOrder): Порядок сортировки по `id` ('asc' или 'desc').
+        task_status (Optional[List[str]]): Фильтр по статусам задач.
         db (AsyncSession): Сессия базы данных.
         user (dict): Информация о текущем пользователе.
 
@@ -62,14 +117,303 @@ async def read_tasks(
         List[ReadTask]: Список задач.
     """
     user_id = user['id']
-    query = select(Task).where(Task.user_id == user_id)
-    result = await db.execute(query)
-    return result.scalars().all()
+    namespace = f'tasks:{user_id}'
+    version = await read_cache.get_or_load('read_tasks', namespace, 'version',
+                                           lambda: get_tasks_version(db, user_id))
+    not_modified = check_not_modified(user_id, version, request, response)
+    if not_modified:
+        return not_modified
+
+    async def load_page():
+        query = select(*READ_TASK_COLUMNS).where(Task.user_id == user_id)
+        if task_status:
+            query = query.where(Task.status.in_(task_status))
+        result = await db.execute(paginate(query, Task.id, cursor, limit, order))
+        rows, next_cursor = cut_page(result.all(), limit)
+        return {'items': rows_as_dicts(rows), 'next_cursor': next_cursor}
+
+    statuses = ','.join(sorted(task_status or []))
+    page = await read_cache.get_or_load('read_tasks', namespace,
+                                        f'page:{limit}:{order}:{cursor}:{statuses}', load_page)
+    set_next_cursor(response, page['next_cursor'])
+    if FAST_JSON_RESPONSES:
+        return fast_json_response(page['items'], response)
+    return page['items']
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_tasks(
+    export_format: ExportFormat = Query('ndjson', alias='format'),
+    task_status: Optional[List[str]] = Query(None, alias='status'),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Потоковая выгрузка всех задач текущего пользователя в NDJSON или CSV.
+
+    Строки читаются серверным курсором и отправляются порциями по мере
+    получения, поэтому память не зависит от количества задач.
+
+    Аргументы:
+        export_format (ExportFormat): Формат выгрузки ('ndjson' или 'csv').
+        task_status (Optional[List[str]]): Фильтр по статусам задач.
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Информация о текущем пользователе.
+
+    Возвращает:
+        StreamingResponse: Поток строк выгрузки.
+    """
+    query = (
+        select(*READ_TASK_COLUMNS)
+        .where(Task.user_id == user['id'])
+        .order_by(Task.id)
+    )
+    if task_status:
+        query = query.where(Task.status.in_(task_status))
+    return StreamingResponse(
+        stream_rows(db, query, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="tasks.{export_format}"'}
+    )
+
+
+@router.get('/search', response_model=List[ReadTask])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Полнотекстовый поиск по заголовкам и описаниям задач текущего пользователя.
+
+    Задача попадает в выдачу, если содержит все слова запроса. Результаты
+    упорядочены по релевантности; курсор следующей страницы возвращается
+    в заголовке `X-Next-Cursor`.
+
+    Аргументы:
+        response (Response): Ответ для установки заголовков.
+        q (str): Строка запроса.
+        limit (int): Размер страницы.
+        cursor (Optional[str]): Курсор, полученный с предыдущей страницей.
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Информация о текущем пользователе.
+
+    Возвращает:
+        List[ReadTask]: Найденные задачи.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    query = search_tasks_query(db.get_bind().dialect.name, user['id'], terms, cursor, limit)
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_rank_cursor(rows[-1].rank, rows[-1].id))
+    return rows_as_dicts(rows)
+
+
+@router.get('/stats', response_model=ReadTaskStats)
+async def task_stats(
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Число задач текущего пользователя по статусам.
+
+    Ответ строится из счетчиков `task_stats`, которые база данных обновляет
+    при каждом изменении задач, поэтому время ответа не зависит от числа
+    задач. Счетчики кэшируются в `read_cache` до следующего изменения задач.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Информация о текущем пользователе.
+
+    Возвращает:
+        ReadTaskStats: Число задач по статусам и общее число задач.
+    """
+    user_id = user['id']
+    by_status = await read_cache.get_or_load('task_stats', f'tasks:{user_id}', 'stats',
+                                             lambda: read_task_stats(db, user_id))
+    return {'by_status': by_status, 'total': sum(by_status.values())}
+
+
+@router.get('/stream', response_class=StreamingResponse)
+async def stream_tasks(
+    last_event_id: Optional[int] = Header(None, alias='Last-Event-ID'),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Лента изменений задач текущего пользователя (Server-Sent Events).
+
+    Отправляет события `created`, `updated` и `deleted` с данными задачи
+    вместо периодического опроса `GET /task`. При переподключении с
+    заголовком `Last-Event-ID` пропущенные события досылаются; если это
+    невозможно, приходит событие `reset` и список задач нужно загрузить заново.
+    Соединение с базой данных на время подписки не занимается.
+
+    Аргументы:
+        last_event_id (Optional[int]): Номер последнего полученного события.
+        user (dict): Информация о текущем пользователе.
+
+    Возвращает:
+        StreamingResponse: Поток text/event-stream.
+    """
+    return StreamingResponse(
+        event_stream(task_events, user['id'], last_event_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@router.post('/bulk', response_model=List[BulkTaskResult])
+async def create_tasks_bulk(
+    tasks: Annotated[List[CreateTask], Body(min_length=1, max_length=MAX_BULK_SIZE)],
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Пакетное создание задач.
+
+    Заголовки проверяются на дубликаты одним запросом, а все допустимые задачи
+    вставляются одной командой INSERT ... RETURNING в одной транзакции.
+
+    Аргументы:
+        tasks (List[CreateTask]): Задачи для создания.
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Информация о текущем пользователе.
+
+    Исключения:
+        HTTPException: Если не удалось записать задачи в базу данных.
+
+    Возвращает:
+        List[BulkTaskResult]: Результат для каждой задачи в порядке запроса.
+    """
+    titles = {task.title for task in tasks}
+    query = select(Task.title).where(Task.title.in_(titles))
+    if TASK_TITLE_UNIQUE_SCOPE == 'user':
+        query = query.where(Task.user_id == user['id'])
+    taken = set((await db.scalars(query)).all())
+
+    results: List[Optional[BulkTaskResult]] = [None] * len(tasks)
+    accepted = []
+    for index, task in enumerate(tasks):
+        if task.status not in TASK_STATUSES:
+            results[index] = BulkTaskResult(index=index, status_code=status.HTTP_400_BAD_REQUEST,
+                                            detail="Недопустимый статус задачи")
+        elif task.title in taken:
+            results[index] = BulkTaskResult(index=index, status_code=status.HTTP_400_BAD_REQUEST,
+                                            detail=TITLE_TAKEN)
+        else:
+            taken.add(task.title)
+            accepted.append((index, {**task.model_dump(), 'user_id': user['id']}))
+
+    if accepted:
+        try:
+            ids = (await db.scalars(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                [values for _, values in accepted]
+            )).all()
+            await bump_tasks_version(db, user['id'])
+            await db.commit()
+        except IntegrityError as e:
+            # Заголовок заняли параллельным запросом после проверки
+            await db.rollback()
+            if is_title_conflict(e):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=TITLE_TAKEN)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="Ошибка при добавлении задач в базу данных")
+        except Exception:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="Ошибка при добавлении задач в базу данных")
+        await read_cache.invalidate(f"tasks:{user['id']}")
+        for (index, values), task_id in zip(accepted, ids):
+            results[index] = BulkTaskResult(index=index, id=task_id, status_code=status.HTTP_201_CREATED)
+            await task_events.publish(user['id'], 'created', ReadTask(id=task_id, **values).model_dump())
+
+    return results
+
+
+@router.patch('/bulk', response_model=List[BulkTaskResult])
+async def update_tasks_bulk(
+    tasks: Annotated[List[UpdateTaskStatus], Body(min_length=1, max_length=MAX_BULK_SIZE)],
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Пакетное обновление статусов задач.
+
+    Принадлежность задач пользователю проверяется одним запросом, а обновление
+    выполняется одной командой UPDATE с набором параметров (executemany).
+    Событие `updated` для каждой задачи содержит ее целиком, как и при
+    обновлении одной задачи.
+
+    Аргументы:
+        tasks (List[UpdateTaskStatus]): Идентификаторы задач и новые статусы.
+        db (AsyncSession): Сессия базы данных.
+        user (dict): Информация о текущем пользователе.
+
+    Исключения:
+        HTTPException: Если не удалось записать изменения в базу данных.
+
+    Возвращает:
+        List[BulkTaskResult]: Результат для каждой задачи в порядке запроса.
+    """
+    user_id = user['id']
+    requested_ids = {task.id for task in tasks}
+    owned = set((await db.scalars(
+        select(Task.id).where(Task.user_id == user_id, Task.id.in_(requested_ids))
+    )).all())
+
+    results = []
+    params = []
+    for index, task in enumerate(tasks):
+        if task.status not in TASK_STATUSES:
+            results.append(BulkTaskResult(index=index, id=task.id, status_code=status.HTTP_400_BAD_REQUEST,
+                                          detail="Недопустимый статус задачи"))
+        elif task.id not in owned:
+            results.append(BulkTaskResult(index=index, id=task.id, status_code=status.HTTP_404_NOT_FOUND,
+                                          detail="Задача не найдена"))
+        else:
+            params.append({'task_id': task.id, 'new_status': task.status})
+            results.append(BulkTaskResult(index=index, id=task.id, status_code=status.HTTP_200_OK))
+
+    if params:
+        statement = (
+            update(Task.__table__)
+            .where(Task.id == bindparam('task_id'), Task.user_id == user_id)
+            .values(status=bindparam('new_status'))
+        )
+        updated_ids = list(dict.fromkeys(values['task_id'] for values in params))
+        try:
+            await db.execute(statement, params)
+            # UPDATE с набором параметров не везде поддерживает RETURNING, поэтому
+            # задачи для событий читаются в той же транзакции
+            rows = (await db.execute(
+                select(*READ_TASK_COLUMNS).where(Task.id.in_(updated_ids), Task.user_id == user_id)
+            )).all()
+            await bump_tasks_version(db, user_id)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="Ошибка при обновлении задач в базе данных")
+        await read_cache.invalidate(f'tasks:{user_id}')
+        updated = {row.id: row_as_dict(row) for row in rows}
+        for task_id in updated_ids:
+            await task_events.publish(user_id, 'updated', updated[task_id])
+
+    return results
 
 
 @router.get('/{task_id}', response_model=ReadTask)
 async def get_task_id(
         task_id: int,
+        request: Request,
+        response: Response,
         db: AsyncSession = Depends(get_db),
         user: dict[str, int] = Depends(get_current_user)
 ) -> ReadTask:
@@ -77,18 +421,28 @@ async def get_task_id(
     Получить задачу по ID для текущего пользователя.
 
     - **task_id**: ID задачи, которую нужно получить.
+    - **request**: Текущий запрос.
+    - **response**: Ответ для установки ETag.
     - **db**: Асинхронная сессия базы данных.
     - **user**: Информация о текущем пользователе.
 
     Возвращает объект задачи, если задача найдена; иначе вызывает HTTPException 404.
+    Если If-None-Match совпадает с ETag версии задач пользователя, возвращает 304.
+    Задача кэшируется в `read_cache` до следующего изменения задач пользователя.
     """
     user_id = user['id']  # Получаем ID пользователя
+    namespace = f'tasks:{user_id}'
+    version = await read_cache.get_or_load('get_task_id', namespace, 'version',
+                                           lambda: get_tasks_version(db, user_id))
+    not_modified = check_not_modified(user_id, version, request, response)
+    if not_modified:
+        return not_modified
 
+    async def load_task():
+        query = select(*READ_TASK_COLUMNS).where(Task.id == task_id, Task.user_id == user_id)
+        return row_as_dict((await db.execute(query)).first())
 
-    query = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-    result = await db.execute(query)
-    task = result.scalars().first()
-
+    task = await read_cache.get_or_load('get_task_id', namespace, f'task:{task_id}', load_task)
 
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
@@ -105,6 +459,11 @@ async def update_task(
     """
     Обновление существующей задачи.
 
+    Выполняется двумя командами в одной транзакции: UPDATE ... RETURNING
+    изменяет задачу (если она не найдена или принадлежит другому пользователю,
+    команда не вернет строк), а второй UPDATE увеличивает версию списка задач
+    пользователя для ETag.
+
     Аргументы:
         task_id (int): Идентификатор задачи для обновления.
         task (UpdateTask): Данные задачи для обновления.
@@ -118,21 +477,25 @@ async def update_task(
         UpdateTask: Обновленная задача.
     """
     # Проверка на допустимый статус задачи
-    if task.status and task.status not in ["Новая", "В процессе", "Завершена"]:
+    if task.status and task.status not in TASK_STATUSES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый статус задачи")
 
-    query = select(Task).where(Task.id == task_id, Task.user_id == user['id'])
-    result = await db.execute(query)
-    db_task = result.scalars().first()
+    statement = (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == user['id'])
+        .values(**task.model_dump(exclude_unset=True))
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    db_task = (await db.execute(statement)).scalar_one_or_none()
 
     if db_task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена")
 
-    for key, value in task.dict(exclude_unset=True).items():
-        setattr(db_task, key, value)
-
+    await bump_tasks_version(db, user['id'])
     await db.commit()
-    await db.refresh(db_task)
+    await read_cache.invalidate(f"tasks:{user['id']}")
+    await task_events.publish(user['id'], 'updated', ReadTask.model_validate(db_task, from_attributes=True).model_dump())
     return db_task
 
 @router.delete('/{task_id}', response_model=dict)
@@ -144,6 +507,9 @@ async def delete_task(
     """
     Удаление существующей задачи.
 
+    Выполняется двумя командами в одной транзакции: DELETE ... RETURNING id
+    удаляет задачу, а UPDATE увеличивает версию списка задач пользователя для ETag.
+
     Аргументы:
         task_id (int): Идентификатор задачи для удаления.
         db (AsyncSession): Сессия базы данных.
@@ -155,13 +521,19 @@ async def delete_task(
     Возвращает:
         dict: Словарь с сообщением об успешном удалении задачи.
     """
-    query = select(Task).where(Task.id == task_id, Task.user_id == user['id'])
-    result = await db.execute(query)
-    db_task = result.scalars().first()
-
-    if db_task is None:
+    statement = (
+        delete(Task)
+        .where(Task.id == task_id, Task.user_id == user['id'])
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_id = (await db.execute(statement)).scalar_one_or_none()
+
+    if deleted_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена")
 
-    await db.delete(db_task)
+    await bump_tasks_version(db, user['id'])
     await db.commit()
+    await read_cache.invalidate(f"tasks:{user['id']}")
+    await task_events.publish(user['id'], 'deleted', {'id': deleted_id})
     return {"detail": "Задача успешно удалена"}
@@ -1,39 +1,63 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Response
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.db_session import get_db
-from typing import Annotated
+from typing import Annotated, Optional
 from app.models import User
-from sqlalchemy import select
+from sqlalchemy import select, update
 from app.schemas import CreateUser, ReadUser
-from passlib.context import CryptContext
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SortOrder, paginate, split_page
+from app.hashing import hash_password
+from app.cache import read_cache
+from app.fast_json import FAST_JSON_RESPONSES, fast_json_response, rows_as_dicts
+from app.projection import row_as_dict, schema_columns
 
 router = APIRouter(prefix='/users', tags=['Users'])
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+# Колонки ReadUser: хеш пароля и служебные поля не читаются
+READ_USER_COLUMNS = schema_columns(ReadUser, User)
 
 
 @router.get('', response_model=list[ReadUser])
-async def all_users(db: Annotated[AsyncSession, Depends(get_db)]):
+async def all_users(
+        db: Annotated[AsyncSession, Depends(get_db)],
+        response: Response,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        order: SortOrder = 'asc'
+):
     """
-    Получение списка всех пользователей.
+    Получение страницы пользователей.
+
+    Используется курсорная пагинация по `id`: если есть следующая страница,
+    ее курсор возвращается в заголовке `X-Next-Cursor`. Выбираются только
+    колонки ReadUser; при FAST_JSON_RESPONSES страница кодируется orjson
+    без валидации моделью ответа.
 
     Аргументы:
         db (AsyncSession): Сессия базы данных.
+        response (Response): Ответ для установки заголовка пагинации.
+        limit (int): Размер страницы.
+        cursor (Optional[str]): Курсор, полученный с предыдущей страницей.
+        order (SortOrder): Порядок сортировки по `id` ('asc' или 'desc').
 
     Возвращает:
         list[ReadUser]: Список пользователей.
 
     Исключения:
-        HTTPException: Если пользователи не найдены или возникает ошибка сервера.
+        HTTPException: Если курсор некорректен, пользователи не найдены или возникает ошибка сервера.
     """
+    query = paginate(select(*READ_USER_COLUMNS), User.id, cursor, limit, order)
     try:
-        result = await db.scalars(select(User))
-        users = result.all()
+        result = await db.execute(query)
+        users = split_page(result.all(), limit, response)
 
         if not users:
             raise HTTPException(status_code=404, detail="Пользователи не найдены")
 
-        return users
+        if FAST_JSON_RESPONSES:
+            return fast_json_response(rows_as_dicts(users), response)
+        return rows_as_dicts(users)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -43,6 +67,8 @@ async def get_user(db: Annotated[AsyncSession, Depends(get_db)], user_id: int):
     """
     Получение пользователя по его идентификатору.
 
+    Результат кэшируется в `read_cache` до изменения или удаления пользователя.
+
     Аргументы:
         db (AsyncSession): Сессия базы данных.
         user_id (int): Идентификатор пользователя.
@@ -53,7 +79,10 @@ async def get_user(db: Annotated[AsyncSession, Depends(get_db)], user_id: int):
     Исключения:
         HTTPException: Если пользователь не найден.
     """
-    user = await db.scalar(select(User).where(User.id == user_id))
+    async def load_user():
+        return row_as_dict((await db.execute(select(*READ_USER_COLUMNS).where(User.id == user_id))).first())
+
+    user = await read_cache.get_or_load('get_user', f'user:{user_id}', 'data', load_user)
 
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Пользователь не найден')
@@ -76,7 +105,7 @@ async def create_user(db: Annotated[AsyncSession, Depends(get_db)], create_user:
     Исключения:
         HTTPException: Если пользователь с таким адресом электронной почты уже существует.
     """
-    hashed_password = bcrypt_context.hash(create_user.password)
+    hashed_password = await hash_password(create_user.password)
 
 
     new_user = User(name=create_user.name, email=create_user.email, password=hashed_password)
@@ -92,6 +121,8 @@ async def create_user(db: Annotated[AsyncSession, Depends(get_db)], create_user:
             detail="Пользователь с таким адресом электронной почты уже существует"
         )
 
+    # Сбрасываем возможный закэшированный ответ 404 для нового идентификатора
+    await read_cache.invalidate(f'user:{new_user.id}')
     return new_user
 
 
@@ -104,6 +135,10 @@ async def update_user(
     """
     Обновление данных существующего пользователя.
 
+    Изменение выполняется командой UPDATE ... RETURNING с колонками ReadUser,
+    без загрузки ORM-объекта. Существование пользователя проверяется до
+    хеширования пароля, чтобы не тратить bcrypt на несуществующий id.
+
     Аргументы:
         user_id (int): Идентификатор пользователя.
         update_user (CreateUser): Данные для обновления пользователя.
@@ -115,17 +150,22 @@ async def update_user(
     Исключения:
         HTTPException: Если пользователь не найден или существует коллизия с адресом электронной почты.
     """
-    user = await db.scalar(select(User).where(User.id == user_id))
-    if user is None:
+    if await db.scalar(select(User.id).where(User.id == user_id)) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Пользователь не найден')
 
+    values = {'name': update_user.name, 'email': update_user.email}
     if update_user.password:
-        user.password = bcrypt_context.hash(update_user.password)
-    user.name = update_user.name
-    user.email = update_user.email
-
+        values['password'] = await hash_password(update_user.password)
+
+    statement = (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(*READ_USER_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
     try:
-        db.add(user)
+        user = (await db.execute(statement)).first()
         await db.commit()
     except IntegrityError:
         await db.rollback()
@@ -134,7 +174,11 @@ async def update_user(
             detail="Пользователь с таким адресом электронной почты уже существует"
         )
 
-    return user
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Пользователь не найден')
+
+    await read_cache.invalidate(f'user:{user_id}')
+    return row_as_dict(user)
 
 
 @router.delete('/{user_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -155,5 +199,6 @@ async def delete_user(db: Annotated[AsyncSession, Depends(get_db)], user_id: int
 
     await db.delete(user)
     await db.commit()
+    await read_cache.invalidate(f'user:{user_id}')
 
     return {"detail": "Пользователь успешно удален"}
@@ -1,7 +1,7 @@
 """Модели Pydantic для пользователя и задач"""
 
 from pydantic import BaseModel, EmailStr, constr
-from typing import Optional
+from typing import Dict, Optional
 
 
 class ReadUser(BaseModel):
@@ -71,4 +71,69 @@ class CreateTask(BaseModel):
     """
     title: str
     description: Optional[str] = None
-    status: str
\ No newline at end of file
+    status: str
+
+class UpdateTaskStatus(BaseModel):
+    """
+    Модель для пакетного обновления статуса задачи.
+
+    Атрибуты:
+        id (int): Идентификатор задачи.
+        status (str): Новый статус задачи.
+    """
+    id: int
+    status: str
+
+
+class BulkTaskResult(BaseModel):
+    """
+    Результат обработки одного элемента пакетного запроса.
+
+    Атрибуты:
+        index (int): Позиция элемента во входном массиве.
+        id (Optional[int]): Идентификатор созданной или обновленной задачи.
+        status_code (int): HTTP-код результата для этого элемента.
+        detail (Optional[str]): Описание ошибки, если элемент не обработан.
+    """
+    index: int
+    id: Optional[int] = None
+    status_code: int
+    detail: Optional[str] = None
+
+
+class ReadTaskStats(BaseModel):
+    """
+    Модель счетчиков задач пользователя.
+
+    Атрибуты:
+        by_status (Dict[str, int]): Число задач для каждого статуса.
+        total (int): Общее число задач.
+    """
+    by_status: Dict[str, int]
+    total: int
+
+
+class RefreshTokenRequest(BaseModel):
+    """
+    Модель запроса с токеном обновления.
+
+    Атрибуты:
+        refresh_token (str): Токен обновления, выданный при входе или предыдущем обновлении.
+    """
+    refresh_token: str
+
+
+class TokenPair(BaseModel):
+    """
+    Модель ответа с парой токенов.
+
+    Атрибуты:
+        access_token (str): JWT токен доступа.
+        refresh_token (str): Токен обновления для получения новой пары.
+        token_type (str): Тип токена доступа.
+        expires_in (int): Время жизни токена доступа в секундах.
+    """
+    access_token: str
+    refresh_token: str
+    token_type: str = 'bearer'
+    expires_in: int
@@ -0,0 +1,104 @@
+"""
+Модуль полнотекстового поиска задач.
+
+Индекс описан в `app.models.tasks` (FTS5 в SQLite, tsvector с GIN-индексом
+в PostgreSQL). Здесь строится запрос поиска для диалекта текущей сессии.
+
+Индекс разделен по владельцу: в SQLite условие на колонку `user_id` входит в
+выражение MATCH, а в PostgreSQL составной GIN-индекс `(user_id, search_vector)`
+отбирает задачи пользователя. Поэтому релевантность считается только для
+задач пользователя, сколько бы совпадений ни было у остальных.
+
+Выдача упорядочена по релевантности, а при равной релевантности - по `id`.
+Оценка приводится к виду "меньше - лучше" для обеих баз (bm25 в SQLite уже
+такой, ts_rank в PostgreSQL берется со знаком минус), поэтому пагинация
+по курсору `(оценка, id)` устроена одинаково. Оценки зависят от статистики
+всего индекса, так что при изменении задач между запросами страниц выдача
+может немного сместиться.
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Select, Table, and_, func, literal_column, or_, select
+
+from app.models import Task
+from app.pagination import decode_rank_cursor
+from app.projection import schema_columns
+from app.schemas import ReadTask
+
+# Ограничение числа слов не дает собрать слишком дорогой запрос
+MAX_SEARCH_TERMS = 16
+
+# Колонки ReadTask, выбираемые вместе с оценкой релевантности
+SEARCH_COLUMNS = schema_columns(ReadTask, Task)
+
+# Внешняя таблица FTS5 не входит в метаданные моделей: ее создает DDL из app.models.tasks
+tasks_fts = Table('tasks_fts', MetaData(), Column('rowid', Integer))
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Разбивает строку запроса на слова.
+
+    Синтаксис FTS5 и tsquery клиенту недоступен: операторы и кавычки
+    отбрасываются, а все слова должны встретиться в задаче.
+
+    Аргументы:
+        q (str): Строка запроса.
+
+    Возвращает:
+        List[str]: Слова запроса в нижнем регистре.
+    """
+    return re.findall(r'\w+', q.lower())[:MAX_SEARCH_TERMS]
+
+
+def search_tasks_query(dialect: str, user_id: int, terms: List[str],
+                       cursor: Optional[str], limit: int) -> Select:
+    """
+    Строит запрос страницы результатов поиска задач пользователя.
+
+    Аргументы:
+        dialect (str): Имя диалекта базы данных ('sqlite' или 'postgresql').
+        user_id (int): Идентификатор пользователя.
+        terms (List[str]): Слова запроса (из `search_terms`).
+        cursor (Optional[str]): Курсор предыдущей страницы.
+        limit (int): Размер страницы.
+
+    Возвращает:
+        Select: Запрос колонок ReadTask и оценки `rank` с одной лишней записью
+        для определения следующей страницы.
+
+    Исключения:
+        ValueError: Если полнотекстовый поиск для диалекта не поддерживается.
+    """
+    if dialect == 'sqlite':
+        fts = literal_column('tasks_fts')
+        phrase = ' '.join(f'"{term}"' for term in terms)
+        matches = (
+            # Колонка user_id только отбирает задачи и не влияет на оценку (вес 0)
+            select(tasks_fts.c.rowid.label('task_id'), func.bm25(fts, 1.0, 1.0, 0.0).label('rank'))
+            .where(fts.op('MATCH')(f'user_id : "{int(user_id)}" AND {{title description}} : ({phrase})'))
+            .subquery()
+        )
+        query = (
+            select(*SEARCH_COLUMNS, matches.c.rank)
+            .join(matches, matches.c.task_id == Task.id)
+            .where(Task.user_id == user_id)
+        )
+    elif dialect == 'postgresql':
+        vector = literal_column('tasks.search_vector')
+        tsquery = func.plainto_tsquery('simple', ' '.join(terms))
+        query = (
+            select(*SEARCH_COLUMNS, (-func.ts_rank(vector, tsquery)).label('rank'))
+            .where(Task.user_id == user_id, vector.op('@@')(tsquery))
+        )
+    else:
+        raise ValueError(f"Полнотекстовый поиск не поддерживается для {dialect}")
+
+    page = query.subquery()
+    query = select(page)
+    if cursor is not None:
+        rank, last_id = decode_rank_cursor(cursor)
+        query = query.where(or_(page.c.rank > rank, and_(page.c.rank == rank, page.c.id > last_id)))
+    return query.order_by(page.c.rank, page.c.id).limit(limit + 1)
@@ -0,0 +1,109 @@
+"""
+Модуль объединения одинаковых одновременных чтений (single-flight).
+
+Если несколько запросов одновременно загружают одно и то же значение
+(тот же маршрут, пространство имен пользователя и параметры запроса),
+загрузку выполняет только первый из них - ведущий, прямо в своем
+обработчике. Остальные ждут его результат через `asyncio.shield`, поэтому
+отмена ведомого не отменяет общую загрузку. Ошибка загрузки передается
+всем ожидающим. Если отменяется сам ведущий (клиент отключился), ведомые
+не получают ошибку, а повторяют загрузку: один из них становится новым
+ведущим.
+
+Запись в пространство имен (`forget`, вызывается из `ReadCache.invalidate`
+после коммита) убирает его загрузки из реестра: запросы, пришедшие после
+записи, не присоединяются к загрузкам, начатым до нее.
+
+Объединение работает внутри одного процесса и отключается переменной
+окружения SINGLE_FLIGHT_ENABLED=0.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _retrieve(future: asyncio.Future) -> None:
+    # Ошибка без ведомых иначе попадет в журнал как "never retrieved"
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Реестр загрузок, выполняющихся в данный момент.
+
+    Атрибуты:
+        enabled (bool): Объединять ли загрузки.
+        leaders (int): Число выполненных загрузок.
+        followers (int): Число запросов, получивших результат чужой загрузки.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self.leaders = 0
+        self.followers = 0
+        self._calls: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def do(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет загрузку или присоединяется к уже идущей.
+
+        Аргументы:
+            namespace (str): Пространство имен для сброса при записи (например, `tasks:42`).
+            key (str): Ключ загрузки внутри пространства имен (маршрут и параметры).
+            loader (Callable): Корутина загрузки этого запроса.
+
+        Возвращает:
+            Any: Результат загрузки (общий объект для всех участников, его нельзя изменять).
+        """
+        if not self.enabled:
+            return await loader()
+        while True:
+            call_key = (namespace, key)
+            call = self._calls.get(call_key)
+            if call is None:
+                break
+            try:
+                result = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Отменен ведущий, а не этот запрос: повторяем загрузку
+                continue
+            self.followers += 1
+            return result
+
+        call = asyncio.get_running_loop().create_future()
+        call.add_done_callback(_retrieve)
+        self._calls[call_key] = call
+        self.leaders += 1
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            if self._calls.get(call_key) is call:
+                del self._calls[call_key]
+
+    def forget(self, namespace: str) -> None:
+        """Отделяет новые запросы пространства имен от уже идущих загрузок."""
+        for call_key in [call_key for call_key in self._calls if call_key[0] == namespace]:
+            del self._calls[call_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает число загрузок, объединенных запросов и загрузок в процессе."""
+        return {'leaders': self.leaders, 'followers': self.followers, 'in_flight': len(self._calls)}
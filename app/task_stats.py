@@ -0,0 +1,121 @@
+"""
+Модуль счетчиков задач по статусам (`task_stats`).
+
+Счетчики поддерживают триггеры базы данных (см. `app.models.stats`), а здесь
+собраны чтение счетчиков пользователя, полное восстановление по таблице
+задач и проверка согласованности.
+
+Запуск:
+    python -m app.task_stats check      # код возврата 1, если есть расхождения
+    python -m app.task_stats rebuild    # пересчитать все счетчики
+
+Восстановление выполняется в одной транзакции; в PostgreSQL таблица задач
+на это время блокируется от записи, чтобы триггеры параллельных транзакций
+не разошлись с пересчетом.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.database.db import engine
+from app.models import TASK_STATUSES, Task, TaskStats
+
+
+async def read_task_stats(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """
+    Возвращает число задач пользователя по статусам.
+
+    Читает не больше одной строки на статус по первичному ключу, поэтому
+    время ответа не зависит от числа задач.
+
+    Аргументы:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): Идентификатор пользователя.
+
+    Возвращает:
+        Dict[str, int]: Число задач для каждого статуса (отсутствующие - 0).
+    """
+    rows = await db.execute(select(TaskStats.status, TaskStats.count).where(TaskStats.user_id == user_id))
+    return {**dict.fromkeys(TASK_STATUSES, 0), **dict(rows.tuples().all())}
+
+
+async def count_tasks(conn: AsyncConnection) -> Dict[Tuple[int, str], int]:
+    """Подсчитывает задачи по пользователям и статусам прямо по таблице задач."""
+    rows = await conn.execute(select(Task.user_id, Task.status, func.count()).group_by(Task.user_id, Task.status))
+    return {(user_id, task_status): count for user_id, task_status, count in rows}
+
+
+async def rebuild_task_stats(conn: AsyncConnection) -> int:
+    """
+    Пересчитывает все счетчики по таблице задач.
+
+    Аргументы:
+        conn (AsyncConnection): Соединение с открытой транзакцией.
+
+    Возвращает:
+        int: Число записанных строк счетчиков.
+    """
+    if conn.dialect.name == 'postgresql':
+        await conn.execute(text('LOCK TABLE tasks IN SHARE MODE'))
+    await conn.execute(delete(TaskStats))
+    result = await conn.execute(
+        insert(TaskStats).from_select(
+            ['user_id', 'status', 'count'],
+            select(Task.user_id, Task.status, func.count()).group_by(Task.user_id, Task.status),
+        )
+    )
+    return result.rowcount
+
+
+async def check_task_stats(conn: AsyncConnection) -> List[dict]:
+    """
+    Сравнивает счетчики с фактическим числом задач.
+
+    Аргументы:
+        conn (AsyncConnection): Соединение с базой данных.
+
+    Возвращает:
+        List[dict]: Расхождения: пользователь, статус, ожидаемое и сохраненное значения.
+    """
+    expected = await count_tasks(conn)
+    stored = {(user_id, task_status): count
+              for user_id, task_status, count in await conn.execute(
+                  select(TaskStats.user_id, TaskStats.status, TaskStats.count))}
+    return [
+        {'user_id': user_id, 'status': task_status,
+         'expected': expected.get((user_id, task_status), 0), 'stored': stored.get((user_id, task_status), 0)}
+        for user_id, task_status in sorted(expected.keys() | stored.keys())
+        if expected.get((user_id, task_status), 0) != stored.get((user_id, task_status), 0)
+    ]
+
+
+async def run(command: str) -> int:
+    try:
+        async with engine.begin() as conn:
+            if command == 'rebuild':
+                print(f"Записано строк счетчиков: {await rebuild_task_stats(conn)}")
+                return 0
+            mismatches = await check_task_stats(conn)
+    finally:
+        await engine.dispose()
+    for mismatch in mismatches:
+        print(json.dumps(mismatch, ensure_ascii=False))
+    print(f"Расхождений: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('check', 'rebuild'))
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.command)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Модуль ограничения частоты попыток входа (token bucket).
+
+Каждая попытка входа забирает по одному токену из двух корзин: корзины имени
+пользователя и корзины IP-адреса клиента. Корзина вмещает `burst` токенов
+и пополняется со скоростью `per_minute` токенов в минуту. Если токенов нет,
+запрос отклоняется с кодом 429 до обращения к базе данных и bcrypt.
+
+Поддерживаются два хранилища:
+- `MemoryBuckets`: корзины в памяти процесса, не больше THROTTLE_MAXSIZE
+  штук; давно не используемые корзины вытесняются первыми, а корзина,
+  успевшая наполниться, ничем не отличается от отсутствующей;
+- `RedisBuckets`: общие корзины для нескольких воркеров на основе клиента,
+  совместимого с `redis.asyncio` (обновление выполняется одним Lua-скриптом).
+
+Настройки (переменные окружения):
+- THROTTLE_BACKEND: 'memory' (по умолчанию), 'redis' или 'none'.
+- THROTTLE_MAXSIZE: максимальное число корзин в памяти (по умолчанию 100000).
+- THROTTLE_REDIS_URL: адрес Redis для бэкенда 'redis'.
+- LOGIN_USER_BURST, LOGIN_USER_PER_MINUTE: корзина имени пользователя (по умолчанию 5 и 5).
+- LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE: корзина IP-адреса (по умолчанию 20 и 20).
+"""
+
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.metrics import METRICS_ENABLED, metrics
+
+load_dotenv()
+
+THROTTLE_BACKEND = os.getenv('THROTTLE_BACKEND', 'memory')
+THROTTLE_MAXSIZE = int(os.getenv('THROTTLE_MAXSIZE', '100000'))
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL', 'redis://localhost:6379/0')
+# Имена длиннее столбца users.name не встречаются, обрезка ограничивает размер ключей
+MAX_KEY_LENGTH = 64
+
+
+class RateLimit(NamedTuple):
+    """
+    Параметры корзины.
+
+    Атрибуты:
+        burst (float): Емкость корзины (число попыток подряд).
+        per_minute (float): Скорость пополнения в токенах в минуту.
+    """
+    burst: float
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+
+LOGIN_USER_LIMIT = RateLimit(float(os.getenv('LOGIN_USER_BURST', '5')), float(os.getenv('LOGIN_USER_PER_MINUTE', '5')))
+LOGIN_IP_LIMIT = RateLimit(float(os.getenv('LOGIN_IP_BURST', '20')), float(os.getenv('LOGIN_IP_PER_MINUTE', '20')))
+
+
+def take_token(tokens: float, updated: float, now: float, limit: RateLimit) -> Tuple[bool, float, float]:
+    """
+    Пополняет корзину за прошедшее время и пытается забрать один токен.
+
+    Аргументы:
+        tokens (float): Число токенов при последнем обновлении.
+        updated (float): Время последнего обновления в секундах.
+        now (float): Текущее время в секундах.
+        limit (RateLimit): Параметры корзины.
+
+    Возвращает:
+        Tuple[bool, float, float]: Разрешена ли попытка, новое число токенов
+        и через сколько секунд появится следующий токен (0, если разрешена).
+    """
+    tokens = min(limit.burst, tokens + (now - updated) * limit.per_second)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / limit.per_second
+
+
+class BucketBackend(ABC):
+    """Интерфейс хранилища корзин."""
+
+    @abstractmethod
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        """
+        Забирает токен из корзины `key`.
+
+        Возвращает:
+            Tuple[bool, float]: Разрешена ли попытка и время ожидания в секундах.
+        """
+
+
+class MemoryBuckets(BucketBackend):
+    """
+    Корзины в памяти процесса с ограничением числа записей.
+
+    Атрибуты:
+        maxsize (int): Максимальное число корзин.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.burst, now))
+        allowed, tokens, retry_after = take_token(tokens, updated, now, limit)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+# Тот же алгоритм, что и в take_token, выполняемый атомарно на стороне Redis
+TAKE_TOKEN_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBuckets(BucketBackend):
+    """
+    Общие корзины в Redis.
+
+    Ключи живут не дольше времени полного наполнения корзины, поэтому
+    объем данных ограничен числом активных клиентов.
+
+    Аргументы:
+        client: Клиент с асинхронным методом eval, совместимый с `redis.asyncio.Redis`.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        allowed, retry_after = await self.client.eval(
+            TAKE_TOKEN_SCRIPT, 1, key, limit.burst, limit.per_second, time.time()
+        )
+        if isinstance(retry_after, bytes):
+            retry_after = retry_after.decode()
+        return bool(int(allowed)), float(retry_after)
+
+
+class LoginThrottle:
+    """
+    Ограничитель попыток входа по имени пользователя и IP-адресу.
+
+    Аргументы:
+        backend (Optional[BucketBackend]): Хранилище корзин; None отключает ограничение.
+        user_limit (RateLimit): Параметры корзины имени пользователя.
+        ip_limit (RateLimit): Параметры корзины IP-адреса.
+    """
+
+    def __init__(self, backend: Optional[BucketBackend], user_limit: RateLimit, ip_limit: RateLimit):
+        self.backend = backend
+        self.user_limit = user_limit
+        self.ip_limit = ip_limit
+
+    async def check(self, username: str, ip: Optional[str]) -> None:
+        """
+        Забирает по токену из корзин IP-адреса и имени пользователя.
+
+        Аргументы:
+            username (str): Имя пользователя из формы входа.
+            ip (Optional[str]): IP-адрес клиента.
+
+        Исключения:
+            HTTPException: 429 с заголовком Retry-After, если корзина пуста.
+        """
+        if self.backend is None:
+            return
+        for scope, key, limit in (
+            ('ip', f'login:ip:{ip or "unknown"}', self.ip_limit),
+            ('user', f'login:user:{username[:MAX_KEY_LENGTH]}', self.user_limit),
+        ):
+            allowed, retry_after = await self.backend.take(key, limit)
+            if not allowed:
+                if METRICS_ENABLED:
+                    metrics.inc('login_throttled_total', (scope,))
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Слишком много попыток входа, попробуйте позже",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+
+def build_backend(name: str) -> Optional[BucketBackend]:
+    """
+    Создает хранилище корзин по имени из настроек.
+
+    Аргументы:
+        name (str): 'none', 'memory' или 'redis'.
+
+    Возвращает:
+        Optional[BucketBackend]: Хранилище или None, если ограничение отключено.
+
+    Исключения:
+        ValueError: Если имя хранилища неизвестно.
+    """
+    if name == 'none':
+        return None
+    if name == 'memory':
+        return MemoryBuckets(THROTTLE_MAXSIZE)
+    if name == 'redis':
+        import redis.asyncio
+
+        return RedisBuckets(redis.asyncio.from_url(THROTTLE_REDIS_URL))
+    raise ValueError(f"Неизвестный бэкенд ограничения попыток входа: {name}")
+
+
+login_throttle = LoginThrottle(build_backend(THROTTLE_BACKEND), LOGIN_USER_LIMIT, LOGIN_IP_LIMIT)
@@ -1,16 +1,91 @@
+import hashlib
 import os
+import time
+from collections import OrderedDict
 from datetime import timedelta, datetime
 from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from typing import Any, Dict, Annotated
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
+from app.hashing import bcrypt_context
+from app.metrics import observe_duration
 load_dotenv()
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 SECRET_KEY = os.getenv('SECRET_KEY', 'your_default_secret')  # Убедитесь, что вы импортируете os
 ALGORITHM = 'HS256'
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '300'))
+
+
+class TokenCache:
+    """
+    Ограниченный LRU-кэш проверенных токенов доступа.
+
+    Ключом служит SHA-256 от токена, поэтому сами токены в памяти не хранятся.
+    Запись живет до наступления `exp` токена, но не дольше `ttl` секунд.
+    В кэш попадают только токены, успешно прошедшие все проверки.
+
+    Атрибуты:
+        maxsize (int): Максимальное число записей.
+        ttl (int): Максимальное время жизни записи в секундах.
+        hits (int): Число попаданий.
+        misses (int): Число промахов.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, Dict[str, Any]]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Dict[str, Any] | None:
+        """
+        Возвращает данные пользователя для токена, если запись еще действительна.
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            deadline, user = entry
+            if time.time() <= deadline:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(user)
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, token: str, user: Dict[str, Any], expire: float) -> None:
+        """
+        Сохраняет данные пользователя до момента `expire` (но не дольше `ttl`).
+        """
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (min(expire, time.time() + self.ttl), dict(user))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очищает кэш и счетчики."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает размер кэша и счетчики попаданий и промахов."""
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: timedelta | None = None) -> str:
 
     """
@@ -40,16 +115,20 @@ def verify_access_token(token: str) -> Dict[str, Any]:
     """
     if not token:
         raise ValueError("Токен не может быть пустым")
+    started = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         raise ValueError("Недействительный токен")
+    finally:
+        observe_duration('token_verification_duration_seconds', (), started)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     """
     Извлекает текущего пользователя из токена доступа.
+    Результат успешной проверки кэшируется в `token_cache` до истечения токена.
     Параметры:
     - token (str): JWT токен доступа, полученный из заголовков запроса.
     Возвращает:
@@ -57,6 +136,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     Исключения:
     - HTTPException: Если токен недействителен или истек.
     """
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     payload = verify_access_token(token)
     if not payload:
         raise HTTPException(
@@ -81,10 +163,12 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Token expired!"
         )
-    return {
+    user = {
         'username': name,
         'id': user_id,
     }
+    token_cache.put(token, user, expire)
+    return user
 async def generate_access_token(name: str, user_id: int, expires_delta: timedelta | None = None):
     """
     Генерирует токен доступа для указанного пользователя.
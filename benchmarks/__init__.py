@@ -0,0 +1 @@
+"""Бенчмарки производительности API и запросов к базе данных."""
@@ -0,0 +1,56 @@
+"""
+Сравнение пакетного создания задач с циклом по одиночному эндпоинту.
+
+Запросы выполняются внутри процесса через ASGI-транспорт httpx на временной
+базе SQLite, поэтому сеть не влияет на результат.
+
+Запуск:
+    python -m benchmarks.bulk_tasks --tasks 500
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+
+from benchmarks.harness import app_client, auth_headers, use_temporary_database
+
+
+async def run(tasks: int) -> dict:
+    headers = auth_headers(1)
+    payload = [{"title": f"bench_{uuid.uuid4().hex}", "status": "Новая"} for _ in range(tasks * 2)]
+
+    async with app_client() as client:
+        started = time.perf_counter()
+        for task in payload[:tasks]:
+            response = await client.post("/task", json=task, headers=headers)
+            assert response.status_code == 201, response.text
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post("/task/bulk", json=payload[tasks:], headers=headers)
+        assert response.status_code == 200, response.text
+        bulk = time.perf_counter() - started
+
+    return {
+        "tasks": tasks,
+        "single_tasks_per_s": round(tasks / single, 1),
+        "bulk_tasks_per_s": round(tasks / bulk, 1),
+        "speedup": round(single / bulk, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temporary_database(tmp)
+        print(json.dumps(asyncio.run(run(args.tasks)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
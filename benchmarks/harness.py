@@ -0,0 +1,110 @@
+"""
+Общие инструменты бенчмарков.
+
+Приложение запускается внутри процесса через ASGI-транспорт httpx на
+временной базе SQLite. Переменная DATABASE_URL выставляется до импорта
+`app`, поэтому модули приложения импортируются внутри функций.
+"""
+
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Sequence
+
+
+def use_temporary_database(directory: str) -> str:
+    """
+    Направляет приложение на новую базу SQLite во временном каталоге.
+
+    Должна вызываться до первого импорта `app`.
+
+    Аргументы:
+        directory (str): Каталог для файла базы данных.
+
+    Возвращает:
+        str: Строка подключения к базе.
+    """
+    url = f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    # Сценарий входа измеряет стоимость bcrypt, а не ограничитель попыток
+    os.environ.setdefault("THROTTLE_BACKEND", "none")
+    return url
+
+
+@asynccontextmanager
+async def app_client() -> AsyncIterator["AsyncClient"]:
+    """
+    Создает таблицы и возвращает клиент httpx, работающий с приложением в процессе.
+    """
+    from httpx import ASGITransport, AsyncClient
+
+    from app.database.db import Base, engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+    finally:
+        await engine.dispose()
+
+
+def auth_headers(user_id: int, name: str = "bench") -> Dict[str, str]:
+    """Возвращает заголовок авторизации для пользователя без обращения к /auth/token."""
+    from app.utils import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': name, 'id': user_id})}"}
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Возвращает перцентиль выборки методом ближайшего ранга.
+
+    Аргументы:
+        samples (Sequence[float]): Значения.
+        q (float): Перцентиль от 0 до 100.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Сводит задержки запросов (в секундах) в пропускную способность и перцентили (в мс).
+    """
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+            metric: str = "p95_ms", threshold: float = 0.2) -> List[str]:
+    """
+    Сравнивает результаты с эталонным прогоном.
+
+    Аргументы:
+        baseline (Dict): Результаты эталонного прогона по сценариям.
+        current (Dict): Результаты текущего прогона.
+        metric (str): Сравниваемая метрика задержки.
+        threshold (float): Допустимое относительное замедление (0.2 = 20%).
+
+    Возвращает:
+        List[str]: Описания сценариев, замедлившихся сильнее порога.
+    """
+    regressions = []
+    for scenario, result in current.items():
+        before = baseline.get(scenario, {}).get(metric)
+        if not before:
+            continue
+        change = (result[metric] - before) / before
+        if change > threshold:
+            regressions.append(f"{scenario}: {metric} {before} -> {result[metric]} (+{change:.0%})")
+    return regressions
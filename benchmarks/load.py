@@ -0,0 +1,145 @@
+"""
+Нагрузочный бенчмарк основных эндпоинтов API.
+
+Скрипт заполняет временную базу N пользователями и M задачами, затем с
+заданной конкурентностью прогоняет сценарии `/auth/token`, `GET /task`,
+`POST /task` и `PUT /task/{id}` через приложение в процессе и печатает
+req/s и перцентили p50/p95/p99 в формате JSON.
+
+Режим сравнения (`--compare baseline.json`) завершает прогон с кодом 1,
+если метрика задержки какого-либо сценария выросла больше порога.
+
+Запуск:
+    python -m benchmarks.load --users 100 --tasks 10000 --concurrency 20 --output current.json
+    python -m benchmarks.load --compare current.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.harness import app_client, auth_headers, compare, summarize, use_temporary_database
+
+PASSWORD = "benchpassword"
+STATUSES = ["Новая", "В процессе", "Завершена"]
+SCENARIOS = ("auth_token", "list_tasks", "create_task", "update_task")
+
+
+async def seed(users: int, tasks: int) -> None:
+    """Заполняет базу пользователями с общим хешем пароля и задачами."""
+    from sqlalchemy import insert
+
+    from app.database.db import engine
+    from app.hashing import hash_password
+    from app.models import Task, User
+
+    password = await hash_password(PASSWORD)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": i, "name": f"user{i}", "email": f"user{i}@example.com", "password": password}
+            for i in range(1, users + 1)
+        ])
+        for start in range(1, tasks + 1, 10_000):
+            await conn.execute(insert(Task), [
+                {"id": i, "title": f"task{i}", "status": random.choice(STATUSES),
+                 "user_id": (i - 1) % users + 1}
+                for i in range(start, min(start + 10_000, tasks + 1))
+            ])
+
+
+async def run_scenario(make_request: Callable[[int], Awaitable], requests: int,
+                       concurrency: int) -> Dict[str, float]:
+    """Выполняет `requests` запросов `concurrency` параллельными воркерами."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            response = await make_request(index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {**summarize(latencies, time.perf_counter() - started), "errors": errors}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    async with app_client() as client:
+        await seed(args.users, args.tasks)
+        headers = [auth_headers(i, f"user{i}") for i in range(1, args.users + 1)]
+
+        def random_user() -> int:
+            return random.randint(1, args.users)
+
+        def random_task() -> tuple[int, int]:
+            task_id = random.randint(1, args.tasks)
+            return task_id, (task_id - 1) % args.users + 1
+
+        requests = {
+            "auth_token": lambda i: client.post("/auth/token", data={
+                "username": f"user{random_user()}", "password": PASSWORD}),
+            "list_tasks": lambda i: client.get("/task", headers=headers[random_user() - 1]),
+            "create_task": lambda i: client.post("/task", headers=headers[random_user() - 1], json={
+                "title": f"bench_{uuid.uuid4().hex}", "status": random.choice(STATUSES)}),
+            "update_task": lambda i: (lambda task_id, user_id: client.put(
+                f"/task/{task_id}", headers=headers[user_id - 1],
+                json={"status": random.choice(STATUSES)}))(*random_task()),
+        }
+
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = await run_scenario(requests[scenario], args.requests, args.concurrency)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument("--output", help="файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="эталонный JSON для поиска регрессий")
+    parser.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms"))
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temporary_database(tmp)
+        results = asyncio.run(run(args))
+
+    report = {
+        "config": {key: getattr(args, key) for key in ("users", "tasks", "concurrency", "requests", "seed")},
+        "results": results,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(baseline, results, args.metric, args.threshold)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Сравнение планов запросов до и после создания индексов.
+
+Скрипт создает временную базу SQLite, заполняет ее указанным числом задач
+(по умолчанию 1 000 000), выполняет основные запросы приложения без индексов,
+затем создает индексы моделей и повторяет замеры. Для каждого запроса
+выводятся план (`EXPLAIN QUERY PLAN`) и среднее время выполнения.
+
+Запуск:
+    python -m benchmarks.query_plans --tasks 1000000 --users 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.models import Task, User
+from app.models.tasks import TASK_STATUS_CODES
+
+# В таблице tasks статус хранится кодом из справочника task_statuses
+STATUSES = list(TASK_STATUS_CODES.values())
+
+QUERIES = {
+    "read_tasks": (
+        "SELECT id, title, description, status FROM tasks "
+        "WHERE user_id = :user_id AND id > :last_id ORDER BY id LIMIT 51"
+    ),
+    "read_tasks_by_status": (
+        "SELECT id, title, description, status FROM tasks "
+        "WHERE user_id = :user_id AND status = :status ORDER BY id LIMIT 51"
+    ),
+    "create_task_title_check": "SELECT id FROM tasks WHERE title = :title",
+    "authenticate_user": "SELECT id, password FROM users WHERE name = :name",
+}
+
+
+def seed(conn: sqlite3.Connection, users: int, tasks: int) -> None:
+    """Создает таблицы без индексов и заполняет их данными."""
+    dialect = sqlite.dialect()
+    for table in (User.__table__, Task.__table__):
+        conn.execute(str(CreateTable(table).compile(dialect=dialect)))
+    conn.executemany(
+        "INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)",
+        ((i, f"user{i}", f"user{i}@example.com", "x" * 60) for i in range(1, users + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO tasks (id, title, description, status, user_id) VALUES (?, ?, ?, ?, ?)",
+        ((i, f"task{i}", None, random.choice(STATUSES), random.randint(1, users))
+         for i in range(1, tasks + 1)),
+    )
+    conn.commit()
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    """Создает индексы, объявленные в моделях."""
+    dialect = sqlite.dialect()
+    for table in (User.__table__, Task.__table__):
+        for index in table.indexes:
+            conn.execute(str(CreateIndex(index).compile(dialect=dialect)))
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def measure(conn: sqlite3.Connection, params: dict, repeat: int) -> dict:
+    """Возвращает план и среднее время (мс) каждого запроса."""
+    report = {}
+    for name, sql in QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        report[name] = {
+            "plan": plan,
+            "avg_ms": round((time.perf_counter() - started) * 1000 / repeat, 3),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        seed(conn, args.users, args.tasks)
+        params = {
+            "user_id": args.users // 2,
+            "last_id": 0,
+            "status": STATUSES[0],
+            "title": f"task{args.tasks}",
+            "name": f"user{args.users}",
+        }
+        before = measure(conn, params, args.repeat)
+        create_indexes(conn)
+        after = measure(conn, params, args.repeat)
+        conn.close()
+
+    print(json.dumps({"tasks": args.tasks, "users": args.users, "before": before, "after": after},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Сравнение полнотекстового поиска задач с поиском через LIKE.
+
+Скрипт создает временную базу SQLite, заполняет ее указанным числом задач
+(по умолчанию 100 000) со случайными словами в заголовке и описании,
+создает индекс FTS5 из app.models.tasks и сравнивает среднее время
+запроса `GET /task/search` с полным просмотром таблицы через LIKE и с
+прежним индексом без колонки user_id (`fts_unscoped_ms`), который оценивал
+совпадения всех пользователей до фильтра по владельцу.
+
+С `--owner-tasks` у искомого пользователя остается столько задач, а все
+остальные принадлежат другим пользователям; маленький словарь `--words`
+делает слова запроса частыми в этом чужом корпусе.
+
+Запуск:
+    python -m benchmarks.search --tasks 100000 --users 100
+    python -m benchmarks.search --tasks 200000 --owner-tasks 100 --words 300
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy.dialects import sqlite
+
+from app.models.tasks import SEARCH_DDL
+from app.search import search_tasks_query, search_terms
+from benchmarks.query_plans import create_indexes, seed
+
+LIKE_QUERY = (
+    "SELECT id, title, description, status FROM tasks WHERE user_id = :user_id "
+    "AND (title LIKE :pattern OR description LIKE :pattern) ORDER BY id LIMIT 51"
+)
+# Индекс FTS5 до разделения по владельцу (ревизия f18c6e0b93a5) и его запрос
+UNSCOPED_DDL = (
+    "CREATE VIRTUAL TABLE tasks_fts_unscoped USING fts5("
+    "title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO tasks_fts_unscoped(tasks_fts_unscoped) VALUES ('rebuild')",
+)
+UNSCOPED_QUERY = (
+    "SELECT tasks.id, tasks.title, tasks.description, tasks.status, bm25(tasks_fts_unscoped) AS rank "
+    "FROM tasks_fts_unscoped JOIN tasks ON tasks.id = tasks_fts_unscoped.rowid "
+    "WHERE tasks_fts_unscoped MATCH :match AND tasks.user_id = :user_id ORDER BY rank, tasks.id LIMIT 51"
+)
+
+
+def fill_text(conn: sqlite3.Connection, words: list) -> None:
+    """Заполняет заголовки и описания задач случайными словами."""
+    conn.executemany(
+        "UPDATE tasks SET title = ?, description = ? WHERE id = ?",
+        ((f"{' '.join(random.sample(words, 3))} {task_id}", " ".join(random.sample(words, 12)), task_id)
+         for (task_id,) in conn.execute("SELECT id FROM tasks").fetchall()),
+    )
+    conn.commit()
+
+
+def assign_owner(conn: sqlite3.Connection, owner_id: int, owner_tasks: int, users: int) -> None:
+    """Оставляет пользователю `owner_id` первые `owner_tasks` задач, остальные отдает другим."""
+    others = [user_id for user_id in range(1, users + 1) if user_id != owner_id]
+    conn.executemany(
+        "UPDATE tasks SET user_id = ? WHERE id = ?",
+        ((owner_id if task_id <= owner_tasks else others[task_id % len(others)], task_id)
+         for (task_id,) in conn.execute("SELECT id FROM tasks").fetchall()),
+    )
+    conn.commit()
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: dict, repeat: int) -> float:
+    """Возвращает среднее время выполнения запроса в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return round((time.perf_counter() - started) * 1000 / repeat, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--owner-tasks", type=int, default=0,
+                        help="задач у искомого пользователя (0 - случайное распределение)")
+    parser.add_argument("--words", type=int, default=5_000, help="размер словаря")
+    args = parser.parse_args()
+    words = [f"слово{i}" for i in range(args.words)]
+    user_id = args.users // 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        seed(conn, args.users, args.tasks)
+        if args.owner_tasks:
+            assign_owner(conn, user_id, args.owner_tasks, args.users)
+        fill_text(conn, words)
+        create_indexes(conn)
+        started = time.perf_counter()
+        for statement in SEARCH_DDL["sqlite"]:
+            conn.execute(statement)
+        conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        conn.commit()
+        build_s = round(time.perf_counter() - started, 3)
+        for statement in UNSCOPED_DDL:
+            conn.execute(statement)
+        conn.commit()
+
+        report = {}
+        for q in (words[0], f"{words[1]} {words[2]}"):
+            terms = search_terms(q)
+            compiled = search_tasks_query("sqlite", user_id, terms, None, 50).compile(
+                dialect=sqlite.dialect(paramstyle="named")
+            )
+            report[q] = {
+                "fts_ms": timed(conn, str(compiled), compiled.params, args.repeat),
+                "fts_unscoped_ms": timed(conn, UNSCOPED_QUERY, {
+                    "match": " ".join(f'"{term}"' for term in terms), "user_id": user_id}, args.repeat),
+                "matches_all_users": conn.execute(
+                    "SELECT count(*) FROM tasks_fts_unscoped WHERE tasks_fts_unscoped MATCH ?",
+                    (" ".join(f'"{term}"' for term in terms),)).fetchone()[0],
+                "like_ms": timed(conn, LIKE_QUERY, {"user_id": user_id, "pattern": f"%{q.split()[0]}%"},
+                                 args.repeat),
+            }
+        conn.close()
+
+    print(json.dumps({"tasks": args.tasks, "owner_tasks": args.owner_tasks, "index_build_s": build_s,
+                      "queries": report},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Стоимость сериализации списка задач: стандартный путь FastAPI против быстрого.
+
+ORM-путь: выборка объектов `Task`, валидация моделью ответа `List[ReadTask]`
+и кодирование `JSONResponse` (так `GET /task` работал до проекций колонок).
+Стандартный путь: выборка только колонок ReadTask, словари из строк и та же
+валидация и `JSONResponse` - то, что сейчас делает FastAPI для `GET /task`.
+Быстрый путь (FAST_JSON_RESPONSES): те же словари и `ORJSONResponse` без
+валидации. Результаты приводятся в миллисекундах на 10 000 задач;
+проверяется, что все пути дают одинаковый JSON.
+
+Запуск:
+    python -m benchmarks.serialization --tasks 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from benchmarks.harness import app_client, use_temporary_database
+
+
+async def run(tasks: int, repeat: int) -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from sqlalchemy import insert, select
+
+    from app.database.db import SessionLocal
+    from app.fast_json import FastResponse, rows_as_dicts
+    from app.main import app
+    from app.models import Task
+    from app.routers.tasks import READ_TASK_COLUMNS
+
+    route = next(route for route in app.routes if getattr(route, 'name', None) == 'read_tasks')
+    field = route.secure_cloned_response_field or route.response_field
+
+    async with app_client():
+        async with SessionLocal() as session:
+            await session.execute(insert(Task), [
+                {"title": f"task{i}", "description": "описание задачи", "status": "Новая", "user_id": 1}
+                for i in range(tasks)
+            ])
+            await session.commit()
+
+            async def orm_path() -> bytes:
+                session.expunge_all()
+                objects = (await session.scalars(select(Task).order_by(Task.id))).all()
+                content = await serialize_response(field=field, response_content=objects, is_coroutine=True)
+                return JSONResponse(content).body
+
+            async def default_path() -> bytes:
+                rows = (await session.execute(select(*READ_TASK_COLUMNS).order_by(Task.id))).all()
+                content = await serialize_response(field=field, response_content=rows_as_dicts(rows),
+                                                   is_coroutine=True)
+                return JSONResponse(content).body
+
+            async def fast_path() -> bytes:
+                rows = (await session.execute(select(*READ_TASK_COLUMNS).order_by(Task.id))).all()
+                return FastResponse(rows_as_dicts(rows)).body
+
+            report = {}
+            bodies = {}
+            for name, path in (("orm", orm_path), ("default", default_path), ("fast", fast_path)):
+                bodies[name] = await path()
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    await path()
+                elapsed = (time.perf_counter() - started) / repeat
+                report[f"{name}_ms_per_10k"] = round(elapsed * 1000 * 10_000 / tasks, 2)
+
+    assert json.loads(bodies["orm"]) == json.loads(bodies["default"]) == json.loads(bodies["fast"]), \
+        "пути дают разный JSON"
+    report["projection_speedup"] = round(report["orm_ms_per_10k"] / report["default_ms_per_10k"], 1)
+    report["speedup"] = round(report["default_ms_per_10k"] / report["fast_ms_per_10k"], 1)
+    return {"tasks": tasks, **report}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temporary_database(tmp)
+        print(json.dumps(asyncio.run(run(args.tasks, args.repeat)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
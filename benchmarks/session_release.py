@@ -0,0 +1,152 @@
+"""
+Пропускная способность при маленьком пуле соединений: соединение до конца
+запроса против раннего возврата в пул (`EarlyReleaseSession`).
+
+Оба режима выполняют одинаковые запросы через приложение в процессе; пул
+ограничен `--pool-size` соединениями без переполнения. Сетевая задержка
+базы данных имитируется паузой `--latency-ms` перед каждым запросом при уже
+выданном соединении. В режиме `held` соединение занято до закрытия сессии,
+в режиме `early` - только пока обработчик работает с базой.
+
+Сценарии:
+- `auth_token`: между чтением пользователя и записью токена обновления
+  обработчик ждет проверки пароля. На рабочем сервере bcrypt выполняется
+  пулом потоков на других ядрах, и для цикла событий это просто ожидание;
+  здесь оно имитируется паузой `--hash-wait-ms`, а сам bcrypt запускается
+  с низкой стоимостью `--bcrypt-rounds`, чтобы измерение упиралось в пул
+  соединений, а не в единственное ядро процессора;
+- `list_tasks`: `GET /task` с двумя чтениями подряд и без других ожиданий.
+  Выигрыша здесь нет, сценарий показывает цену раннего освобождения.
+
+Для каждого режима считаются COMMIT и ROLLBACK при возврате соединения в
+пул на один HTTP-запрос. Чтения подряд идут в одной транзакции, поэтому
+раннее освобождение добавляет один COMMIT на каждую серию чтений. ROLLBACK
+при возврате соединения после COMMIT драйверы asyncpg, psycopg и sqlite3
+на сервер не отправляют: транзакции у соединения уже нет.
+
+Запуск:
+    python -m benchmarks.session_release --pool-size 4 --concurrency 50 --hash-wait-ms 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from typing import Dict
+
+from benchmarks.harness import app_client, auth_headers, use_temporary_database
+from benchmarks.load import PASSWORD, run_scenario, seed
+
+
+def with_latency(session_class: type, latency: float) -> type:
+    """Добавляет к сессии паузу перед каждым запросом, пока соединение уже выдано."""
+
+    class SlowSession(session_class):
+        async def execute(self, *args, **kwargs):
+            await self.connection()
+            await asyncio.sleep(latency)
+            return await super().execute(*args, **kwargs)
+
+        async def scalar(self, *args, **kwargs):
+            await self.connection()
+            await asyncio.sleep(latency)
+            return await super().scalar(*args, **kwargs)
+
+    return SlowSession
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, dict]]:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.database.db import EarlyReleaseSession, engine
+    from app.database.db_session import get_db
+    from app.hashing import password_hasher
+    from app.main import app
+
+    verify = password_hasher.verify
+
+    async def verify_on_other_cores(password: str, hashed_password: str) -> bool:
+        await asyncio.sleep(args.hash_wait_ms / 1000)
+        return await verify(password, hashed_password)
+
+    password_hasher.verify = verify_on_other_cores
+
+    commits = rollbacks = 0
+
+    def count_commit(conn):
+        nonlocal commits
+        commits += 1
+
+    def count_rollback_on_return(dbapi_connection, connection_record, reset_state):
+        nonlocal rollbacks
+        # Если транзакцию уже откатил Connection.close(), пул ее не трогает
+        if not reset_state.transaction_was_reset:
+            rollbacks += 1
+
+    event.listen(engine.sync_engine, "commit", count_commit)
+    event.listen(engine.sync_engine.pool, "reset", count_rollback_on_return)
+
+    async with app_client() as client:
+        await seed(args.users, args.tasks)
+        headers = [auth_headers(i, f"user{i}") for i in range(1, args.users + 1)]
+        scenarios = {
+            "auth_token": (lambda i: client.post("/auth/token", data={
+                "username": f"user{random.randint(1, args.users)}", "password": PASSWORD}), args.login_requests),
+            "list_tasks": (lambda i: client.get("/task", params={"limit": args.page},
+                                                headers=headers[random.randint(1, args.users) - 1]), args.requests),
+        }
+
+        results: Dict[str, Dict[str, dict]] = {}
+        for scenario, (make_request, requests) in scenarios.items():
+            for mode, session_class in (("held", AsyncSession), ("early", EarlyReleaseSession)):
+                session_factory = async_sessionmaker(bind=engine, expire_on_commit=False,
+                                                     class_=with_latency(session_class, args.latency_ms / 1000))
+
+                async def override_db():
+                    async with session_factory() as session:
+                        yield session
+
+                app.dependency_overrides[get_db] = override_db
+                commits = rollbacks = 0
+                try:
+                    result = await run_scenario(make_request, requests, args.concurrency)
+                finally:
+                    app.dependency_overrides.clear()
+                result["commits_per_request"] = round(commits / requests, 2)
+                result["rollbacks_on_return_per_request"] = round(rollbacks / requests, 2)
+                results.setdefault(scenario, {})[mode] = result
+            results[scenario]["speedup"] = round(
+                results[scenario]["early"]["req_per_s"] / results[scenario]["held"]["req_per_s"], 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--login-requests", type=int, default=400)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--hash-wait-ms", type=float, default=100.0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temporary_database(tmp)
+        os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+        os.environ["DB_MAX_OVERFLOW"] = "0"
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        # Одинаковые одновременные чтения не объединяются, чтобы сравнивать только работу с пулом
+        os.environ["SINGLE_FLIGHT_ENABLED"] = "0"
+        os.environ.setdefault("SLOW_QUERY_MS", "0")
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Пропускная способность записи SQLite в зависимости от числа одновременных запросов.
+
+Сравниваются два режима на отдельных временных файлах:
+- `default`: обычный пул соединений без WAL, писатели конкурируют за
+  блокировку файла (ошибки `database is locked` попадают в `errors`);
+- `concurrent`: режим SQLITE_CONCURRENT=1 - WAL, прагмы и единственное
+  соединение писателя (`build_sqlite_writer`), за которое запросы ждут в
+  очереди пула.
+
+Каждый запрос - `POST /task` (INSERT задачи и обновление версии списка
+в одной транзакции). Единственный писатель не объединяет коммиты, поэтому
+пропускная способность с ростом числа запросов не растет, а растет задержка;
+это и показывает бенчмарк.
+
+Запуск:
+    python -m benchmarks.sqlite_writes --requests 500 --concurrency 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+from typing import Dict, List
+
+from benchmarks.harness import app_client, auth_headers, use_temporary_database
+from benchmarks.load import run_scenario
+
+
+async def run(directory: str, requests: int, levels: List[int]) -> Dict[str, Dict[int, dict]]:
+    from app.database.db import Base, build_engine, build_sessionmaker, build_sqlite_writer, use_sqlite_pragmas
+    from app.database.db_session import get_db
+    from app.main import app
+
+    headers = auth_headers(1, "user1")
+    results: Dict[str, Dict[int, dict]] = {}
+    async with app_client() as client:
+        for mode in ("default", "concurrent"):
+            url = f"sqlite+aiosqlite:///{os.path.join(directory, f'{mode}.db')}"
+            reader = build_engine(url)
+            writer = None
+            if mode == "concurrent":
+                writer = build_sqlite_writer(url)
+                use_sqlite_pragmas(reader)
+                use_sqlite_pragmas(writer)
+            async with (writer or reader).begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = build_sessionmaker(reader, writer)
+
+            async def override_db():
+                async with session_factory() as session:
+                    yield session
+
+            app.dependency_overrides[get_db] = override_db
+            try:
+                for concurrency in levels:
+                    results.setdefault(mode, {})[concurrency] = await run_scenario(
+                        lambda i: client.post("/task", headers=headers, json={
+                            "title": f"write_{uuid.uuid4().hex}", "status": "Новая"}),
+                        requests, concurrency)
+            finally:
+                app.dependency_overrides.clear()
+                await reader.dispose()
+                if writer is not None:
+                    await writer.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temporary_database(tmp)
+        os.environ.setdefault("SLOW_QUERY_MS", "0")
+        print(json.dumps(asyncio.run(run(tmp, args.requests, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.database.db import Base
 from app.database.db_session import get_db
+from app.utils import create_access_token
+from app.models import User
 import uuid
 
 
@@ -53,5 +55,22 @@ async def test_client(db):
     app.dependency_overrides[get_db] = lambda: db
     async with AsyncClient(app=app) as client:
         yield client
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+async def auth_headers():
+    """Заголовки авторизации для отдельного пользователя на каждый тест."""
+    token = create_access_token({"sub": "taskuser", "id": uuid.uuid4().int % 10**9})
+    return {"Authorization": f"Bearer {token}"}
 
 
+
+@pytest.fixture
+async def owner_headers(db):
+    """Заголовки авторизации для пользователя, сохраненного в тестовой базе."""
+    suffix = uuid.uuid4().hex[:12]
+    user = User(name=f"owner_{suffix}", email=f"owner_{suffix}@example.com", password="x")
+    db.add(user)
+    await db.commit()
+    token = create_access_token({"sub": user.name, "id": user.id})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,27 @@
+from benchmarks.harness import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    summary = summarize([0.01] * 10, elapsed=0.5)
+
+    assert summary["requests"] == 10
+    assert summary["req_per_s"] == 20.0
+    assert summary["p99_ms"] == 10.0
+
+
+def test_compare_flags_only_regressions_over_threshold():
+    baseline = {"list_tasks": {"p95_ms": 10.0}, "create_task": {"p95_ms": 10.0}}
+    current = {"list_tasks": {"p95_ms": 13.0}, "create_task": {"p95_ms": 11.0}, "new": {"p95_ms": 1.0}}
+
+    regressions = compare(baseline, current, metric="p95_ms", threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("list_tasks")
@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.cache import CacheBackend, MemoryCache, ReadCache, RedisCache, read_cache
+from app.main import app
+
+
+class FakeRedis:
+    """Локальная подделка клиента redis.asyncio для тестов."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        return True
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+        return int(self.data[key])
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(read_cache, "backend", MemoryCache(maxsize=1000))
+    monkeypatch.setattr(read_cache, "hits", 0)
+    monkeypatch.setattr(read_cache, "misses", 0)
+    return read_cache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_and_ttl_evictions():
+    cache = MemoryCache(maxsize=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.get("a")
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+
+    await cache.set("expired", "4", ttl=-1)
+    assert await cache.get("expired") is None
+    assert cache.evictions == 3
+
+
+@pytest.mark.asyncio
+async def test_read_cache_with_redis_backend_invalidates_namespace():
+    cache = ReadCache(RedisCache(FakeRedis()), ttl=60, disabled_routes={"disabled"})
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return {"value": len(loads)}
+
+    assert await cache.get_or_load("route", "ns:1", "key", loader) == {"value": 1}
+    assert await cache.get_or_load("route", "ns:1", "key", loader) == {"value": 1}
+    await cache.invalidate("ns:1")
+    assert await cache.get_or_load("route", "ns:1", "key", loader) == {"value": 2}
+    assert await cache.get_or_load("disabled", "ns:1", "key", loader) == {"value": 3}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["evictions"] is None
+
+
+def test_incomplete_cache_backend_cannot_be_built():
+    class GetOnlyCache(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_cache_invalidated_by_write(test_client: AsyncClient, auth_headers: dict,
+                                                     memory_cache: ReadCache):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        assert (await ac.get("/task", headers=auth_headers)).json() == []
+        assert (await ac.get("/task", headers=auth_headers)).json() == []
+        assert memory_cache.hits > 0
+
+        response = await ac.post("/task", headers=auth_headers, json={
+            "title": f"cached_{uuid.uuid4().hex[:16]}", "status": "Новая"})
+        assert response.status_code == 201
+
+        tasks = (await ac.get("/task", headers=auth_headers)).json()
+        assert len(tasks) == 1
+
+        await ac.put(f"/task/{tasks[0]['id']}", headers=auth_headers, json={"status": "Завершена"})
+        response = await ac.get(f"/task/{tasks[0]['id']}", headers=auth_headers)
+        assert response.json()["status"] == "Завершена"
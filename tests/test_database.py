@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database.db import Base, build_engine, build_sessionmaker, build_sqlite_writer, use_sqlite_pragmas
+from app.models import TASK_STATUSES, Task
+
+
+@pytest.fixture
+async def sqlite_engines(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/concurrent.db"
+    reader = build_engine(url)
+    writer = build_sqlite_writer(url)
+    use_sqlite_pragmas(reader)
+    use_sqlite_pragmas(writer)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield reader, writer
+    await reader.dispose()
+    await writer.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_enable_wal(sqlite_engines):
+    reader, _ = sqlite_engines
+    async with reader.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+
+
+@pytest.mark.asyncio
+async def test_routing_session_sends_writes_to_writer(sqlite_engines):
+    reader, writer = sqlite_engines
+    session_factory = build_sessionmaker(reader, writer)
+
+    async with session_factory() as session:
+        await session.execute(select(Task))
+        assert session.sync_session.get_bind(clause=select(Task)) is reader.sync_engine
+        await session.execute(insert(Task), [{"title": "routed", "status": "Новая", "user_id": 1}])
+        # После записи чтения в той же транзакции идут через писателя
+        assert session.sync_session.get_bind(clause=select(Task)) is writer.sync_engine
+        await session.rollback()
+        assert session.sync_session.get_bind(clause=select(Task)) is reader.sync_engine
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_do_not_fail(sqlite_engines):
+    session_factory = build_sessionmaker(*sqlite_engines)
+
+    async def create(index: int):
+        async with session_factory() as session:
+            session.add(Task(title=f"concurrent_{index}", status="Новая", user_id=1))
+            await session.commit()
+
+    await asyncio.gather(*(create(index) for index in range(50)))
+
+    async with session_factory() as session:
+        assert len((await session.scalars(select(Task.id))).all()) == 50
+
+
+@pytest.mark.asyncio
+async def test_writer_wait_is_bounded_by_sqlite_writer_timeout(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_WRITER_TIMEOUT", "0")
+    writer = build_sqlite_writer(f"sqlite+aiosqlite:///{tmp_path}/writer.db")
+    try:
+        async with writer.connect():
+            # Второй писатель не ждет освобождения единственного соединения дольше таймаута
+            with pytest.raises(PoolTimeoutError):
+                await writer.connect().start()
+    finally:
+        await writer.dispose()
+
+
+@pytest.mark.asyncio
+async def test_task_status_is_stored_as_code(sqlite_engines):
+    session_factory = build_sessionmaker(*sqlite_engines)
+
+    async with session_factory() as session:
+        session.add(Task(title="coded", status="В процессе", user_id=1))
+        await session.commit()
+        assert (await session.execute(text("SELECT status FROM tasks"))).scalar() == 2
+        assert (await session.scalars(select(Task.status))).one() == "В процессе"
+        assert (await session.scalars(select(Task.id).where(Task.status == "Неизвестный"))).all() == []
+        labels = (await session.execute(text("SELECT label FROM task_statuses ORDER BY id"))).scalars().all()
+        assert tuple(labels) == TASK_STATUSES
+
+
+async def wait_for_release(session):
+    for _ in range(100):
+        if not session.in_transaction():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Транзакция чтения не завершилась")
+
+
+@pytest.mark.asyncio
+async def test_early_release_session_returns_connection_after_reads(sqlite_engines):
+    reader, _ = sqlite_engines
+    session_factory = build_sessionmaker(reader, early_release=True)
+
+    async with session_factory() as session:
+        await session.execute(insert(Task), [{"title": "kept", "status": "Новая", "user_id": 1}])
+        await session.commit()
+
+        task = await session.scalar(select(Task).where(Task.title == "kept"))
+        # Запросы подряд идут в одной транзакции, без COMMIT между ними
+        assert await session.scalar(select(Task.id).where(Task.title == "kept")) == task.id
+        assert session.in_transaction()
+        # Пока обработчик ждет чего-то другого, соединение возвращается в пул
+        await wait_for_release(session)
+        assert reader.pool.checkedout() == 0
+        assert task.status == "Новая"
+
+        # Чтение внутри транзакции с записью не завершает ее
+        await session.execute(insert(Task), [{"title": "dropped", "status": "Новая", "user_id": 1}])
+        assert await session.scalar(select(Task.id).where(Task.title == "dropped")) is not None
+        assert session.in_transaction()
+        await session.rollback()
+
+        session.add(Task(title="flushed", status="Новая", user_id=1))
+        await session.scalar(select(Task.id).where(Task.title == "flushed"))
+        assert session.in_transaction()
+        await session.rollback()
+
+        assert await session.scalar(select(Task.id).where(Task.title.in_(["dropped", "flushed"]))) is None
+        await wait_for_release(session)
+        assert reader.pool.checkedout() == 0
@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import db_session
+from app.database.db_session import get_db
+from app.database.db import Base, EarlyReleaseSession, build_engine, build_sessionmaker
+from app.main import app
+
+
+@pytest.fixture
+async def early_release_engine(tmp_path, monkeypatch):
+    """Подменяет SessionLocal фабрикой, которую создает DB_EARLY_RELEASE=1, на отдельной базе."""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path}/early_release.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(db_session, "SessionLocal", build_sessionmaker(engine, early_release=True))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_api_works_with_early_release_sessions(early_release_engine):
+    name = f"early_{uuid.uuid4().hex[:12]}"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        created = await ac.post("/users", json={"name": name, "email": f"{name}@example.com",
+                                                "password": "securepassword"})
+        assert created.status_code == 201
+        login = await ac.post("/auth/token", data={"username": name, "password": "securepassword"})
+        assert login.status_code == 200
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        assert (await ac.post("/task", headers=headers, json={"title": f"{name}_1", "status": "Новая"})).status_code == 201
+        task_id = (await ac.get("/task", headers=headers)).json()[0]["id"]
+        assert (await ac.put(f"/task/{task_id}", headers=headers, json={"status": "В процессе"})).status_code == 200
+        bulk = await ac.patch("/task/bulk", headers=headers, json=[{"id": task_id, "status": "Завершена"}])
+        assert [item["status_code"] for item in bulk.json()] == [200]
+        assert (await ac.get(f"/task/{task_id}", headers=headers)).json()["status"] == "Завершена"
+        assert (await ac.get("/task/stats", headers=headers)).json()["by_status"]["Завершена"] == 1
+        assert (await ac.delete(f"/task/{task_id}", headers=headers)).status_code == 200
+        assert (await ac.get("/task", headers=headers)).json() == []
+
+    assert early_release_engine.pool.checkedout() == 0
+
+
+@pytest.mark.asyncio
+async def test_release_failure_fails_the_request_that_caused_it(early_release_engine, monkeypatch):
+    async def failing_release(self):
+        raise SQLAlchemyError("COMMIT не выполнен")
+
+    monkeypatch.setattr(EarlyReleaseSession, "_release", failing_release)
+    probe = FastAPI()
+
+    @probe.get("/probe")
+    async def read_then_wait(db: AsyncSession = Depends(get_db)):
+        await db.execute(select(1))
+        # Обработчик уступает цикл событий, и завершение чтения уходит в фон
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    transport = ASGITransport(app=probe, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/probe")
+
+    assert response.status_code == 500
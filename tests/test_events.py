@@ -0,0 +1,119 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.events import EventBroker, RedisEvents, event_stream, task_events
+from app.main import app
+from app.utils import create_access_token
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.add(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.redis.subscribers.discard(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+
+class FakeRedis:
+    """Подделка redis.asyncio: счетчик номеров и канал в памяти."""
+
+    def __init__(self):
+        self.counter = 0
+        self.subscribers = set()
+
+    async def eval(self, script, numkeys, id_key, channel, payload):
+        self.counter += 1
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": f"{self.counter} {payload}".encode()})
+        return self.counter
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+def queued(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return [(event.id, event.type) for event in events]
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_replays_missed_events_of_user():
+    broker = EventBroker(None, history_size=3, queue_size=10)
+    for user_id in (1, 1, 1, 1, 2):
+        await broker.publish(user_id, "created", {"id": 1})
+
+    assert queued(broker.subscribe(1, last_event_id=2)) == [(3, "created"), (4, "created")]
+    assert queued(broker.subscribe(1, last_event_id=5)) == []
+    # События 1 и 2 вытеснены из буфера, а номер 99 брокеру неизвестен
+    assert queued(broker.subscribe(1, last_event_id=0)) == [(5, "reset")]
+    assert queued(broker.subscribe(1, last_event_id=99)) == [(5, "reset")]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_reset_instead_of_unbounded_queue():
+    broker = EventBroker(None, history_size=10, queue_size=2)
+    subscription = broker.subscribe(1)
+    for _ in range(3):
+        await broker.publish(1, "updated", {"id": 1})
+
+    assert queued(subscription) == [(3, "reset")]
+
+    broker.unsubscribe(subscription)
+    assert broker.stats()["subscribers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_delivers_events_across_workers():
+    redis = FakeRedis()
+    publisher = EventBroker(RedisEvents(redis), history_size=10, queue_size=10)
+    listener = EventBroker(RedisEvents(redis), history_size=10, queue_size=10)
+    subscription = listener.subscribe(7)
+    await asyncio.sleep(0)
+
+    await publisher.publish(7, "deleted", {"id": 3})
+    event = await subscription.get(timeout=1)
+
+    assert (event.id, event.type, event.data) == (1, "deleted", {"id": 3})
+    assert listener.last_id == 1
+    listener._listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_task_changes_are_streamed_to_owner(test_client):
+    user_id = uuid.uuid4().int % 10**9
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'streamuser', 'id': user_id})}"}
+    stream = event_stream(task_events, user_id, heartbeat=0.01)
+    assert (await anext(stream)).startswith("retry:")
+    assert await anext(stream) == ": ping\n\n"
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        title = f"stream_{uuid.uuid4().hex[:16]}"
+        await ac.post("/task", headers=headers, json={"title": title, "status": "Новая"})
+        task_id = (await ac.get("/task", headers=headers)).json()[0]["id"]
+        await ac.put(f"/task/{task_id}", headers=headers, json={"status": "Завершена"})
+        await ac.patch("/task/bulk", headers=headers, json=[{"id": task_id, "status": "В процессе"}])
+        await ac.delete(f"/task/{task_id}", headers=headers)
+
+    created = await anext(stream)
+    assert "event: created\n" in created and title in created
+    updated, bulk_updated = await anext(stream), await anext(stream)
+    assert "event: updated\n" in updated and "event: updated\n" in bulk_updated
+    updated_data = json.loads(updated.split("data: ", 1)[1])
+    assert json.loads(bulk_updated.split("data: ", 1)[1]) == {**updated_data, "status": "В процессе"}
+    assert await anext(stream) == f'id: {task_events.last_id}\nevent: deleted\ndata: {{"id": {task_id}}}\n\n'
+    await stream.aclose()
+    assert task_events.stats()["subscribers"] == 0
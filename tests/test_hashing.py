@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from app.hashing import password_hasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_event_loop():
+    hashed = await password_hasher.hash("securepassword")
+
+    assert await password_hasher.verify("securepassword", hashed)
+    assert not await password_hasher.verify("wrongpassword", hashed)
+
+
+@pytest.mark.asyncio
+async def test_hasher_stats_drain_after_concurrent_calls():
+    hashes = await asyncio.gather(*(password_hasher.hash(f"password{i}") for i in range(3)))
+
+    assert len(set(hashes)) == 3
+    stats = password_hasher.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["running"] == 0
+    assert stats["max_workers"] >= 1
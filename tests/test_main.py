@@ -13,4 +13,13 @@ async def test_root():
     assert response.json() == {
         "status": "healthy",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+@pytest.mark.anyio
+async def test_pool_health():
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        response = await ac.get("/health/pool")
+    assert response.status_code == 200
+    assert "pool" in response.json()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.metrics import MetricsRegistry, render
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for value in (0.004, 0.005, 0.3, 20):
+        registry.observe("http_request_duration_seconds", ("GET", "/task"), value)
+
+    text = render(registry.snapshot())
+
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/task",le="0.005"} 2' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/task",le="0.5"} 3' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/task",le="+Inf"} 4' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/task"} 4' in text
+
+
+def test_snapshots_of_workers_are_summed(tmp_path):
+    first, second = MetricsRegistry(str(tmp_path)), MetricsRegistry(str(tmp_path))
+    first.inc("http_requests_total", ("GET", "/task", "200"), 2)
+    second.inc("http_requests_total", ("GET", "/task", "200"), 3)
+    second.observe("bcrypt_duration_seconds", ("verify",), 0.2)
+    # Оба реестра живут в одном процессе, поэтому снимок первого переименовывается
+    first.flush()
+    (tmp_path / f"{os.getpid()}.json").rename(tmp_path / f"{os.getppid()}.json")
+
+    text = render(second.collect())
+
+    assert 'http_requests_total{method="GET",route="/task",status="200"} 5' in text
+    assert 'bcrypt_duration_seconds_count{operation="verify"} 1' in text
+
+
+def test_gauges_are_merged_by_rule_and_dead_workers_are_pruned(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.add_gauge_source(lambda: {"bcrypt_pool_rounds": {(): 12}, "bcrypt_pool_running": {(): 1}})
+    registry.flush()
+    snapshot = tmp_path / f"{os.getpid()}.json"
+    live, dead, stale = (tmp_path / f"{os.getppid()}.json", tmp_path / "999999999.json",
+                         tmp_path / "1.json")
+    for path in (live, dead, stale):
+        path.write_text(snapshot.read_text())
+    os.utime(stale, (0, 0))
+
+    text = render(registry.collect())
+
+    assert "bcrypt_pool_rounds 12" in text
+    assert "bcrypt_pool_running 2" in text
+    assert live.exists() and not dead.exists() and not stale.exists()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_templates(test_client, auth_headers):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/task/999999", headers=auth_headers)
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/task/{task_id}",status="404"}' in response.text
+    assert "http_request_db_queries_count" in response.text
+    assert "db_pool_size" in response.text
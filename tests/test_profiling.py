@@ -0,0 +1,81 @@
+import pstats
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import profiling
+from app.database.db_session import get_db
+from app.main import app
+from app.profiling import ProfilingMiddleware, SlowQueryRouteMiddleware
+
+
+@pytest.mark.asyncio
+async def test_profile_is_saved_for_requests_with_header(tmp_path):
+    profiled = ProfilingMiddleware(app, header_enabled=True, directory=str(tmp_path), keep=1)
+    async with AsyncClient(transport=ASGITransport(app=profiled), base_url="http://test") as ac:
+        plain = await ac.get("/")
+        await ac.get("/", headers={"X-Profile": "1"})
+        response = await ac.get("/", headers={"X-Profile": "1"})
+
+    assert "x-profile-id" not in plain.headers
+    assert [path.name for path in tmp_path.iterdir()] == [response.headers["x-profile-id"]]
+    assert pstats.Stats(str(tmp_path / response.headers["x-profile-id"])).total_calls > 0
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_kept_when_keep_is_zero(tmp_path):
+    profiled = ProfilingMiddleware(app, header_enabled=True, directory=str(tmp_path), keep=0)
+    async with AsyncClient(transport=ASGITransport(app=profiled), base_url="http://test") as ac:
+        first = await ac.get("/", headers={"X-Profile": "1"})
+        second = await ac.get("/", headers={"X-Profile": "1"})
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        [first.headers["x-profile-id"], second.headers["x-profile-id"]])
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_route(test_client, auth_headers, monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(profiling, "SLOW_QUERY_ENDPOINT_ENABLED", True)
+    profiling.slow_queries.clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/task/999999", headers=auth_headers)
+        anonymous = await ac.get("/health/slow-queries")
+        response = await ac.get("/health/slow-queries", headers=auth_headers)
+
+    assert anonymous.status_code == 401
+    entries = response.json()
+    assert entries
+    assert entries[0]["route"] == "GET /task/{task_id}"
+    assert "tasks" in entries[0]["statement"]
+    assert entries[0]["duration_ms"] >= 0
+    assert all("parameters" not in entry and entry["parameter_count"] >= 0 for entry in entries)
+    assert "999999" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_slow_query_endpoint_is_off_by_default(test_client, auth_headers):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/health/slow-queries", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_slow_query_route_does_not_depend_on_metrics(monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+    profiling.slow_queries.clear()
+    probe = FastAPI()
+    probe.add_middleware(SlowQueryRouteMiddleware)
+
+    @probe.get("/probe/{item_id}")
+    async def read_probe(item_id: int, db: AsyncSession = Depends(get_db)):
+        await db.execute(select(item_id))
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=probe), base_url="http://test") as ac:
+        assert (await ac.get("/probe/1")).status_code == 200
+
+    assert profiling.recent_slow_queries()[0]["route"] == "GET /probe/{item_id}"
@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.hashing import bcrypt_context, password_hasher
+from app.main import app
+from app.models import User
+
+PASSWORD = "refreshpassword"
+
+
+@pytest.fixture
+async def login_form(db):
+    name = f"refresh_{uuid.uuid4().hex[:12]}"
+    db.add(User(name=name, email=f"{name}@example.com", password=bcrypt_context.hash(PASSWORD)))
+    await db.commit()
+    return {"username": name, "password": PASSWORD}
+
+
+@pytest.fixture
+def no_bcrypt(monkeypatch):
+    async def forbidden(*args):
+        raise AssertionError("bcrypt не должен вызываться при обновлении токена")
+
+    monkeypatch.setattr(password_hasher, "verify", forbidden)
+    monkeypatch.setattr(password_hasher, "hash", forbidden)
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens_without_bcrypt(test_client: AsyncClient, login_form: dict, request):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        login = (await ac.post("/auth/token", data=login_form)).json()
+        assert login["token_type"] == "bearer"
+
+        request.getfixturevalue("no_bcrypt")
+        response = await ac.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+        assert response.status_code == 200
+        pair = response.json()
+        assert pair["refresh_token"] != login["refresh_token"]
+
+        me = await ac.get("/auth/read_current_user", headers={"Authorization": f"Bearer {pair['access_token']}"})
+        assert me.json()["User"]["username"] == login_form["username"]
+
+
+@pytest.mark.asyncio
+async def test_reused_refresh_token_revokes_family(test_client: AsyncClient, login_form: dict):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = (await ac.post("/auth/token", data=login_form)).json()["refresh_token"]
+        second = (await ac.post("/auth/refresh", json={"refresh_token": first})).json()["refresh_token"]
+
+        assert (await ac.post("/auth/refresh", json={"refresh_token": first})).status_code == 401
+        # Повтор отозвал всю цепочку, включая еще не использованный токен
+        assert (await ac.post("/auth/refresh", json={"refresh_token": second})).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revoked_refresh_token_is_rejected(test_client: AsyncClient, login_form: dict):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        token = (await ac.post("/auth/token", data=login_form)).json()["refresh_token"]
+
+        assert (await ac.post("/auth/revoke", json={"refresh_token": token})).status_code == 200
+        assert (await ac.post("/auth/refresh", json={"refresh_token": token})).status_code == 401
+        assert (await ac.post("/auth/revoke", json={"refresh_token": "unknown"})).status_code == 200
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.cache import ReadCache
+from app.singleflight import SingleFlight
+
+
+class Loader:
+    """Загрузчик, который ждет сигнала и считает вызовы."""
+
+    def __init__(self, result="page", error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_one_load():
+    flights = SingleFlight()
+    loader = Loader()
+    reads = [asyncio.create_task(flights.do("tasks:1", "read_tasks:page", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await asyncio.gather(*reads) == ["page"] * 5
+    assert loader.calls == 1
+    assert flights.stats() == {"leaders": 1, "followers": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_error_is_propagated_to_followers_and_not_cached():
+    flights = SingleFlight()
+    loader = Loader(error=RuntimeError("база недоступна"))
+    reads = [asyncio.create_task(flights.do("tasks:1", "page", loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    results = await asyncio.gather(*reads, return_exceptions=True)
+    assert [str(result) for result in results] == ["база недоступна"] * 3
+
+    retry = Loader()
+    retry.release.set()
+    assert await flights.do("tasks:1", "page", retry) == "page"
+
+
+@pytest.mark.asyncio
+async def test_followers_retry_when_leader_is_cancelled():
+    flights = SingleFlight()
+    leader_loader, follower_loader = Loader(), Loader(result="retried")
+    leader = asyncio.create_task(flights.do("tasks:1", "page", leader_loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("tasks:1", "page", follower_loader))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    follower_loader.release.set()
+
+    assert await follower == "retried"
+    assert leader.cancelled()
+    assert follower_loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_leader():
+    flights = SingleFlight()
+    loader = Loader()
+    leader = asyncio.create_task(flights.do("tasks:1", "page", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("tasks:1", "page", Loader()))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    loader.release.set()
+
+    assert await leader == "page"
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+
+@pytest.mark.asyncio
+async def test_reads_after_write_do_not_join_older_load():
+    cache = ReadCache(None, 60, set())
+    before, after = Loader(result="old"), Loader(result="new")
+    first = asyncio.create_task(cache.get_or_load("read_tasks", "tasks:1", "page", before))
+    await asyncio.sleep(0)
+
+    await cache.invalidate("tasks:1")
+    second = asyncio.create_task(cache.get_or_load("read_tasks", "tasks:1", "page", after))
+    await asyncio.sleep(0)
+    before.release.set()
+    after.release.set()
+
+    assert await asyncio.gather(first, second) == ["old", "new"]
+    assert (before.calls, after.calls) == (1, 1)
@@ -0,0 +1,47 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import update
+
+from app.main import app
+from app.models import TaskStats
+from app.task_stats import check_task_stats, rebuild_task_stats
+from app.utils import create_access_token
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_task_changes(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        response = await ac.post("/task/bulk", headers=auth_headers, json=[
+            {"title": f"stats_{uuid.uuid4().hex[:16]}", "status": "Новая"} for _ in range(3)
+        ])
+        ids = [item["id"] for item in response.json()]
+        await ac.put(f"/task/{ids[0]}", headers=auth_headers, json={"status": "В процессе"})
+        await ac.patch("/task/bulk", headers=auth_headers, json=[{"id": ids[1], "status": "Завершена"}])
+        await ac.delete(f"/task/{ids[2]}", headers=auth_headers)
+
+        response = await ac.get("/task/stats", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"by_status": {"Новая": 0, "В процессе": 1, "Завершена": 1}, "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_repairs_counters(test_client: AsyncClient, db):
+    user_id = uuid.uuid4().int % 10**9
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'statsuser', 'id': user_id})}"}
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await ac.post("/task", headers=headers, json={"title": f"stats_{uuid.uuid4().hex[:16]}", "status": "Новая"})
+    conn = await db.connection()
+    assert await check_task_stats(conn) == []
+
+    await conn.execute(update(TaskStats).where(TaskStats.user_id == user_id).values(count=5))
+    assert await check_task_stats(conn) == [{"user_id": user_id, "status": "Новая", "expected": 1, "stored": 5}]
+
+    await rebuild_task_stats(conn)
+    assert await check_task_stats(conn) == []
@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.routers import tasks as tasks_router
+from app.utils import create_access_token
+
+
+async def create_tasks(ac: AsyncClient, headers: dict, statuses: list[str]) -> None:
+    for task_status in statuses:
+        response = await ac.post("/task", headers=headers, json={
+            "title": f"task_{uuid.uuid4().hex[:16]}",
+            "status": task_status,
+        })
+        assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_cursor_pagination(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая"] * 5)
+
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await ac.get("/task", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            ids += [task["id"] for task in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert len(ids) == 5
+        assert ids == sorted(ids)
+
+        response = await ac.get("/task", headers=auth_headers, params={"order": "desc", "limit": 5})
+        assert [task["id"] for task in response.json()] == sorted(ids, reverse=True)
+        assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_status_filter(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая", "В процессе", "Завершена"])
+
+        response = await ac.get("/task", headers=auth_headers,
+                                params={"status": ["Новая", "Завершена"]})
+        assert response.status_code == 200
+        assert sorted(task["status"] for task in response.json()) == ["Завершена", "Новая"]
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_invalid_cursor(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        response = await ac.get("/task", headers=auth_headers, params={"cursor": "garbage"})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_bulk_reports_per_item_results(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        title = f"bulk_{uuid.uuid4().hex[:16]}"
+        response = await ac.post("/task/bulk", headers=auth_headers, json=[
+            {"title": title, "status": "Новая"},
+            {"title": title, "status": "Новая"},
+            {"title": f"bulk_{uuid.uuid4().hex[:16]}", "status": "Неизвестный"},
+            {"title": f"bulk_{uuid.uuid4().hex[:16]}", "status": "Завершена"},
+        ])
+
+        assert response.status_code == 200
+        results = response.json()
+        assert [item["status_code"] for item in results] == [201, 400, 400, 201]
+        assert results[0]["id"] is not None
+
+        response = await ac.get("/task", headers=auth_headers)
+        assert len(response.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая", "Новая"])
+        ids = [task["id"] for task in (await ac.get("/task", headers=auth_headers)).json()]
+
+        response = await ac.patch("/task/bulk", headers=auth_headers, json=[
+            {"id": ids[0], "status": "Завершена"},
+            {"id": ids[1], "status": "Неизвестный"},
+            {"id": 0, "status": "Завершена"},
+        ])
+
+        assert response.status_code == 200
+        assert [item["status_code"] for item in response.json()] == [200, 400, 404]
+        tasks = {task["id"]: task["status"] for task in (await ac.get("/task", headers=auth_headers)).json()}
+        assert tasks == {ids[0]: "Завершена", ids[1]: "Новая"}
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_task(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая"])
+        task_id = (await ac.get("/task", headers=auth_headers)).json()[0]["id"]
+
+        response = await ac.put(f"/task/{task_id}", headers=auth_headers, json={"status": "В процессе"})
+        assert response.status_code == 200
+        assert response.json() == {"status": "В процессе"}
+        assert (await ac.get(f"/task/{task_id}", headers=auth_headers)).json()["status"] == "В процессе"
+
+        response = await ac.delete(f"/task/{task_id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert (await ac.get(f"/task/{task_id}", headers=auth_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_duplicate_title_is_rejected_by_unique_index(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        title = f"unique_{uuid.uuid4().hex[:16]}"
+        assert (await ac.post("/task", headers=auth_headers, json={"title": title, "status": "Новая"})).status_code == 201
+
+        response = await ac.post("/task", headers=auth_headers, json={"title": title, "status": "Новая"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Задача с таким заголовком уже есть"
+        assert len((await ac.get("/task", headers=auth_headers)).json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_foreign_task_not_found(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая"])
+        task_id = (await ac.get("/task", headers=auth_headers)).json()[0]["id"]
+        other_user = {"Authorization": f"Bearer {create_access_token({'sub': 'other', 'id': 0})}"}
+
+        response = await ac.put(f"/task/{task_id}", headers=other_user, json={"status": "Завершена"})
+        assert response.status_code == 404
+        response = await ac.delete(f"/task/{task_id}", headers=other_user)
+        assert response.status_code == 404
+        assert (await ac.get(f"/task/{task_id}", headers=auth_headers)).json()["status"] == "Новая"
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_ndjson_and_csv(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая", "Завершена"])
+
+        response = await ac.get("/task/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["status"] for row in rows] == ["Новая", "Завершена"]
+        assert set(rows[0]) == {"id", "title", "description", "status"}
+
+        response = await ac.get("/task/export", headers=auth_headers, params={"format": "csv"})
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["status"] for row in rows] == ["Новая", "Завершена"]
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_etag_not_modified(test_client: AsyncClient, owner_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, owner_headers, ["Новая"])
+        response = await ac.get("/task", headers=owner_headers)
+        etag = response.headers["ETag"]
+        task_id = response.json()[0]["id"]
+
+        response = await ac.get("/task", headers={**owner_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        response = await ac.get(f"/task/{task_id}", headers={**owner_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        await ac.put(f"/task/{task_id}", headers=owner_headers, json={"status": "Завершена"})
+        response = await ac.get("/task", headers={**owner_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_fast_json_matches_default(test_client: AsyncClient, auth_headers: dict, monkeypatch):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await create_tasks(ac, auth_headers, ["Новая", "Завершена", "В процессе"])
+        default = await ac.get("/task", headers=auth_headers, params={"limit": 2})
+
+        monkeypatch.setattr(tasks_router, "FAST_JSON_RESPONSES", True)
+        fast = await ac.get("/task", headers=auth_headers, params={"limit": 2})
+
+        assert fast.status_code == 200
+        assert fast.json() == default.json()
+        assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
+
+
+@pytest.mark.asyncio
+async def test_search_tasks_ranked_and_paginated(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        word = f"w{uuid.uuid4().hex[:12]}"
+        for title, description in [
+            (f"{word} отчет {uuid.uuid4().hex[:8]}", f"{word} {word} квартальный отчет"),
+            (f"Звонок {uuid.uuid4().hex[:8]}", f"упомянуть {word}"),
+            (f"Отчет {uuid.uuid4().hex[:8]}", "без ключевого слова"),
+        ]:
+            response = await ac.post("/task", headers=auth_headers,
+                                     json={"title": title, "description": description, "status": "Новая"})
+            assert response.status_code == 201
+        other_user = {"Authorization": f"Bearer {create_access_token({'sub': 'other', 'id': 0})}"}
+
+        response = await ac.get("/task/search", headers=auth_headers, params={"q": f"{word.upper()} ОТЧЕТ"})
+        assert response.status_code == 200
+        assert [task["title"].split()[0] for task in response.json()] == [word]
+
+        titles, cursor = [], None
+        while True:
+            params = {"q": word, "limit": 1, **({"cursor": cursor} if cursor else {})}
+            response = await ac.get("/task/search", headers=auth_headers, params=params)
+            titles += [task["title"] for task in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert len(titles) == 2
+        assert titles[0].startswith(word)
+
+        assert (await ac.get("/task/search", headers=other_user, params={"q": word})).json() == []
+        assert (await ac.get("/task/search", headers=auth_headers, params={"q": "\"*"})).json() == []
+        response = await ac.get("/task/search", headers=auth_headers, params={"q": word, "cursor": "garbage"})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_deleted_tasks(test_client: AsyncClient, auth_headers: dict):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        word = f"w{uuid.uuid4().hex[:12]}"
+        await ac.post("/task", headers=auth_headers, json={"title": f"{word} удалить", "status": "Новая"})
+        task_id = (await ac.get("/task/search", headers=auth_headers, params={"q": word})).json()[0]["id"]
+
+        await ac.delete(f"/task/{task_id}", headers=auth_headers)
+        assert (await ac.get("/task/search", headers=auth_headers, params={"q": word})).json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_does_not_match_owner_id(test_client: AsyncClient):
+    user_id = uuid.uuid4().int % 10**9
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner', 'id': user_id})}"}
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        word = f"w{uuid.uuid4().hex[:12]}"
+        await ac.post("/task", headers=headers, json={"title": f"{word} задача", "status": "Новая"})
+
+        # Владелец индексируется отдельной колонкой и не находится как слово задачи
+        assert (await ac.get("/task/search", headers=headers, params={"q": str(user_id)})).json() == []
+        assert len((await ac.get("/task/search", headers=headers, params={"q": word})).json()) == 1
@@ -0,0 +1,74 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.throttle import LoginThrottle, MemoryBuckets, RateLimit, RedisBuckets, login_throttle, take_token
+from app import hashing
+
+
+class FakeRedis:
+    """Локальная подделка redis.asyncio: выполняет алгоритм Lua-скрипта на Python."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def eval(self, script, numkeys, key, burst, per_second, now):
+        tokens, updated = self.data.get(key, (burst, now))
+        allowed, tokens, retry_after = take_token(tokens, updated, now, RateLimit(burst, per_second * 60))
+        self.data[key] = (tokens, now)
+        return [int(allowed), str(retry_after).encode()]
+
+
+@pytest.mark.asyncio
+async def test_memory_buckets_refill_and_stay_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.throttle.time.monotonic", lambda: now[0])
+    buckets = MemoryBuckets(maxsize=2)
+    limit = RateLimit(burst=2, per_minute=60)
+
+    assert (await buckets.take("a", limit))[0]
+    assert (await buckets.take("a", limit))[0]
+    allowed, retry_after = await buckets.take("a", limit)
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+    now[0] += 1
+    assert (await buckets.take("a", limit))[0]
+
+    await buckets.take("b", limit)
+    await buckets.take("c", limit)
+    assert len(buckets._buckets) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_buckets_are_shared_between_throttles():
+    client = FakeRedis()
+    limit = RateLimit(burst=1, per_minute=1)
+    first = LoginThrottle(RedisBuckets(client), limit, RateLimit(100, 100))
+    second = LoginThrottle(RedisBuckets(client), limit, RateLimit(100, 100))
+
+    await first.check("alice", "10.0.0.1")
+    with pytest.raises(HTTPException) as error:
+        await second.check("alice", "10.0.0.2")
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "60"
+
+
+@pytest.mark.asyncio
+async def test_throttled_login_skips_bcrypt(test_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(login_throttle, "backend", MemoryBuckets(maxsize=100))
+    monkeypatch.setattr(login_throttle, "user_limit", RateLimit(burst=1, per_minute=1))
+    form = {"username": f"flood_{uuid.uuid4().hex[:12]}", "password": "wrong"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.post("/auth/token", data=form)).status_code == 401
+
+        async def forbidden(*args):
+            raise AssertionError("bcrypt не должен вызываться для отклоненной попытки")
+        monkeypatch.setattr(hashing.password_hasher, "verify", forbidden)
+
+        response = await ac.post("/auth/token", data=form)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
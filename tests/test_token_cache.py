@@ -0,0 +1,50 @@
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.utils import TokenCache, create_access_token, get_current_user, token_cache
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cache():
+    token = create_access_token({"sub": "cacheduser", "id": 42})
+    token_cache.clear()
+
+    first = await get_current_user(token)
+    second = await get_current_user(token)
+
+    assert first == second == {"username": "cacheduser", "id": 42}
+    assert token_cache.stats()["hits"] == 1
+    assert token_cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_cache_counters_are_exported_as_metrics(test_client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'metricsuser', 'id': 43})}"}
+    token_cache.clear()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/task", headers=headers)
+        await ac.get("/task", headers=headers)
+        text = (await ac.get("/metrics")).text
+
+    assert "token_cache_hits 1\n" in text
+    assert "token_cache_misses 1\n" in text
+    assert "token_cache_size 1\n" in text
+
+
+def test_token_cache_evicts_expired_and_lru_entries():
+    cache = TokenCache(maxsize=2, ttl=60)
+    cache.put("expired", {"id": 1}, time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.put("a", {"id": 1}, time.time() + 60)
+    cache.put("b", {"id": 2}, time.time() + 60)
+    cache.get("a")
+    cache.put("c", {"id": 3}, time.time() + 60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    assert cache.stats()["size"] == 2
@@ -1,7 +1,12 @@
+import uuid
+
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from app.main import app
+from app.models import User
 
 
 @pytest.fixture
@@ -53,3 +58,37 @@ async def test_create_user_duplicate(test_client: AsyncClient, user_payload: dic
         response = await ac.post("/users", json=user_payload)
 
         assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_user_reads_do_not_select_password(test_client: AsyncClient, db):
+    suffix = uuid.uuid4().hex[:12]
+    user = User(name=f"reader_{suffix}", email=f"reader_{suffix}@example.com", password="x" * 60)
+    db.add(user)
+    await db.commit()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.get(f"/users/{user.id}")
+            assert response.json() == {"id": user.id, "name": user.name, "email": user.email}
+            assert (await ac.get("/users", params={"limit": 1})).status_code == 200
+
+            response = await ac.put(f"/users/{user.id}", json={
+                "name": f"renamed_{suffix}", "email": user.email, "password": "newpassword"
+            })
+            assert response.json() == {"id": user.id, "name": f"renamed_{suffix}", "email": user.email}
+            assert (await ac.put("/users/0", json={
+                "name": "nobody", "email": "nobody@example.com", "password": "newpassword"
+            })).status_code == 404
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert selects and not any("password" in statement for statement in selects)